@@ -0,0 +1,420 @@
+"""
+Generates synthetic reference and target sources where every obfuscated name is known, and times every step of the deobfuscation with them.
+The target sources are obfuscated with "§" names like the real rtanks client, so name_cleaner is benchmarked too.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import os
+import json
+import time
+import re
+import random
+import shutil
+import name_cleaner
+import rtanks_deobfuscator
+
+BENCHMARK_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\benchmark"
+CORPUS_CLASS_COUNTS:List[int] = [100, 500, 2000] # one corpus is generated and benchmarked for every count
+RANDOM_SEED = 1
+
+PACKAGE_COUNT = 12
+MAX_PACKAGE_DEPTH = 3
+MAX_IMPORT_COUNT = 6
+MAX_VAR_COUNT = 6
+MAX_FUNCTION_COUNT = 6
+MAX_PARAM_COUNT = 3
+MAX_ACCESS_COUNT = 4 # how many accesses to other classes every function body has at most
+STATIC_RATE = 0.2
+GETTER_SETTER_RATE = 0.15
+OBFUSCATION_RATE = 0.7 # how big part of the names are obfuscated in the target sources
+CHANGED_CLASS_RATE = 0.05 # how big part of the target classes get an extra var, so they are not exactly same as in the reference sources
+
+BUILTIN_TYPES = ["int", "uint", "Number", "String", "Boolean", "Array", "Object"]
+NAME_WORDS = ["tank", "battle", "user", "model", "panel", "weapon", "hull", "turret", "chat", "garage", "shop", "map", "bonus", "effect", "sound", "loader", "client", "server", "command", "event"]
+OBFUSCATED_NAME_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+@dataclass
+class GeneratedVar:
+    name:str
+    type:str
+    visibility:str
+    static:bool
+
+
+@dataclass
+class GeneratedFunction:
+    name:str
+    return_type:str
+    param_names:List[str]
+    param_types:List[str]
+    static:bool
+    setter_getter:str
+    body_lines:List[str] = field(default_factory=list)
+
+
+@dataclass
+class GeneratedClass:
+    package_name:str
+    name:str
+    extends:str
+    imports:List["GeneratedClass"] = field(default_factory=list)
+    vars:List[GeneratedVar] = field(default_factory=list)
+    functions:List[GeneratedFunction] = field(default_factory=list)
+    changed:bool = False # gets an extra var in the target sources
+
+
+class CorpusGenerator:
+    """
+    Every original name is obfuscated to the same "§" name everywhere, like the real obfuscator does.
+    name_by_obfuscated_name maps the "§" names back to the original names, so it's the ground truth of the corpus.
+    """
+
+    def __init__(self, class_count:int, seed:int = RANDOM_SEED) -> None:
+        self.class_count = class_count
+        self.random = random.Random(seed)
+        self.obfuscated_name_by_name:Dict[str, str] = {}
+        self.name_by_obfuscated_name:Dict[str, str] = {}
+        self.used_names = set()
+        self.classes:List[GeneratedClass] = []
+
+    def get_unique_name(self, capitalize:bool) -> str:
+        name = self.random.choice(NAME_WORDS) + "".join(x.capitalize() for x in self.random.sample(NAME_WORDS, 2))
+
+        if capitalize:
+            name = name[0].upper() + name[1:]
+
+        # there are not that many word combinations, so a number is added if the name is taken
+        unique_name = name
+        index = 1
+
+        while unique_name in self.used_names:
+            index += 1
+            unique_name = name + str(index)
+
+        self.used_names.add(unique_name)
+
+        return unique_name
+
+    def obfuscate(self, name:str) -> str:
+        if name in BUILTIN_TYPES or name == "void":
+            return name
+
+        if not name in self.obfuscated_name_by_name:
+            obfuscated_name = name
+
+            # every name is decided to be obfuscated or not only once, so it's same everywhere
+            if self.random.random() < OBFUSCATION_RATE:
+                while obfuscated_name in self.name_by_obfuscated_name or obfuscated_name == name:
+                    length = self.random.randint(2, 4)
+                    obfuscated_name = "§" + "".join(self.random.choice(OBFUSCATED_NAME_CHARS) for _ in range(length)) + "§"
+
+                self.name_by_obfuscated_name[obfuscated_name] = name
+
+            self.obfuscated_name_by_name[name] = obfuscated_name
+
+        return self.obfuscated_name_by_name[name]
+
+    def obfuscate_package(self, package_name:str) -> str:
+        return ".".join(self.obfuscate(x) for x in package_name.split("."))
+
+    def generate_classes(self) -> None:
+        packages = []
+
+        for _ in range(PACKAGE_COUNT):
+            depth = self.random.randint(1, MAX_PACKAGE_DEPTH)
+            packages.append(".".join(self.random.choice(NAME_WORDS) + "s" for _ in range(depth)))
+
+        for _ in range(self.class_count):
+            self.classes.append(GeneratedClass(
+                package_name = self.random.choice(packages),
+                name = self.get_unique_name(True),
+                extends = self.random.choice(["", "", "Sprite", "EventDispatcher"]),
+                changed = self.random.random() < CHANGED_CLASS_RATE
+            ))
+
+        for generated_class in self.classes:
+            other_classes = [x for x in self.classes if x is not generated_class]
+            generated_class.imports = self.random.sample(other_classes, min(len(other_classes), self.random.randint(0, MAX_IMPORT_COUNT)))
+            types = BUILTIN_TYPES + [x.name for x in generated_class.imports]
+
+            for _ in range(self.random.randint(0, MAX_VAR_COUNT)):
+                generated_class.vars.append(GeneratedVar(
+                    name = self.get_unique_name(False),
+                    type = self.random.choice(types),
+                    visibility = self.random.choice(["public", "private", "protected"]),
+                    static = self.random.random() < STATIC_RATE
+                ))
+
+            for _ in range(self.random.randint(0, MAX_FUNCTION_COUNT)):
+                setter_getter = ""
+
+                if self.random.random() < GETTER_SETTER_RATE:
+                    setter_getter = self.random.choice(["get", "set"])
+
+                param_count = 1 if setter_getter == "set" else 0 if setter_getter == "get" else self.random.randint(0, MAX_PARAM_COUNT)
+
+                generated_class.functions.append(GeneratedFunction(
+                    name = self.get_unique_name(False),
+                    return_type = self.random.choice(types + ["void"]) if setter_getter != "set" else "void",
+                    param_names = ["param" + str(x + 1) for x in range(param_count)],
+                    param_types = [self.random.choice(types) for _ in range(param_count)],
+                    static = self.random.random() < STATIC_RATE,
+                    setter_getter = setter_getter
+                ))
+
+        # bodies are made last, because they access members of the imported classes
+        for generated_class in self.classes:
+            for function in generated_class.functions:
+                function.body_lines = self.generate_body_lines(generated_class)
+
+    def generate_body_lines(self, generated_class:GeneratedClass) -> List[str]:
+        """
+        Lines use the original names, they are obfuscated when the file is written.
+        """
+
+        body_lines = []
+
+        for local_var_index in range(self.random.randint(0, MAX_ACCESS_COUNT)):
+            access_type = self.random.randint(0, 2)
+
+            if access_type == 0 and generated_class.vars:
+                var = self.random.choice(generated_class.vars)
+                body_lines.append(f"this.{var.name}.toString();")
+            elif access_type == 1 and generated_class.imports:
+                imported_class = self.random.choice(generated_class.imports)
+                static_members = [x.name for x in imported_class.vars + imported_class.functions if x.static]
+
+                if static_members:
+                    body_lines.append(f"trace({imported_class.name}.{self.random.choice(static_members)});")
+            elif access_type == 2 and generated_class.imports:
+                imported_class = self.random.choice(generated_class.imports)
+                members = [x.name for x in imported_class.vars + imported_class.functions if not x.static]
+                local_var_name = f"_loc{local_var_index + 1}_"
+                body_lines.append(f"var {local_var_name}:{imported_class.name} = new {imported_class.name}();")
+
+                if members:
+                    body_lines.append(f"{local_var_name}.{self.random.choice(members)} = null;")
+
+            if self.random.random() < 0.5:
+                body_lines.append("if(value > 0) { value--; }")
+
+        return body_lines
+
+    def get_class_text(self, generated_class:GeneratedClass, obfuscated:bool) -> str:
+        name = self.obfuscate if obfuscated else lambda x: x
+        package_name = self.obfuscate_package if obfuscated else lambda x: x
+        lines = [f"package {package_name(generated_class.package_name)}", "{"]
+
+        for imported_class in generated_class.imports:
+            lines.append(f"   import {package_name(imported_class.package_name)}.{name(imported_class.name)};")
+
+        lines.append("   import flash.display.Sprite;")
+        lines.append("   import flash.events.EventDispatcher;")
+        lines.append("   ")
+
+        extends = f" extends {generated_class.extends}" if generated_class.extends else ""
+        lines.append(f"   public class {name(generated_class.name)}{extends}")
+        lines.append("   {")
+
+        vars = list(generated_class.vars)
+
+        if obfuscated and generated_class.changed:
+            # the extra var is in the ground truth too, but it can't be found because it's not in the reference sources
+            vars.append(GeneratedVar(name = "extraVar" + generated_class.name, type = "int", visibility = "private", static = False))
+
+        for var in vars:
+            static = " static" if var.static else ""
+            lines.append(f"      {var.visibility}{static} var {name(var.name)}:{name(var.type)};")
+
+        lines.append("      ")
+
+        for function in generated_class.functions:
+            static = " static" if function.static else ""
+            setter_getter = f" {function.setter_getter}" if function.setter_getter else ""
+            params = ", ".join(f"{name(x)}:{name(y)}" for x, y in zip(function.param_names, function.param_types))
+            lines.append(f"      public{static} function{setter_getter} {name(function.name)}({params}) : {name(function.return_type)}")
+            lines.append("      {")
+
+            for body_line in function.body_lines:
+                if obfuscated:
+                    body_line = self.obfuscate_body_line(body_line)
+
+                lines.append("         " + body_line)
+
+            lines.append("      }")
+            lines.append("      ")
+
+        lines.append("   }")
+        lines.append("}")
+        lines.append("")
+
+        return "\n".join(lines)
+
+    def obfuscate_body_line(self, body_line:str) -> str:
+        # only the generated names are in obfuscated_name_by_name, so keywords and local vars stay as they are
+        return IDENTIFIER_PATTERN.sub(lambda x: self.obfuscated_name_by_name.get(x.group(0), x.group(0)), body_line)
+
+    def write_files(self, path:str, obfuscated:bool) -> None:
+        for generated_class in self.classes:
+            if obfuscated:
+                directory = os.path.join(path, *self.obfuscate_package(generated_class.package_name).split("."))
+                file_name = self.obfuscate(generated_class.name) + ".as"
+            else:
+                directory = os.path.join(path, *generated_class.package_name.split("."))
+                file_name = generated_class.name + ".as"
+
+            os.makedirs(directory, exist_ok=True)
+
+            with open(os.path.join(directory, file_name), "w", encoding="utf-8") as file:
+                file.write(self.get_class_text(generated_class, obfuscated))
+
+    def generate(self, reference_path:str, target_path:str) -> None:
+        self.generate_classes()
+        self.write_files(reference_path, False)
+        self.write_files(target_path, True)
+
+
+class TimedPass:
+    """
+    Wraps a deobfuscation pass and sums the time that its deobfuscate calls take.
+    """
+
+    def __init__(self, deobfuscation_pass) -> None:
+        self.deobfuscation_pass = deobfuscation_pass
+        self.seconds = 0.0
+
+    def deobfuscate(self, target_AS_parsers:List[rtanks_deobfuscator.ActionScriptFileParser] | None = None) -> None:
+        start = time.perf_counter()
+        self.deobfuscation_pass.deobfuscate(target_AS_parsers)
+        self.seconds += time.perf_counter() - start
+
+
+def get_precision_and_recall(new_name_by_old_name:Dict[str, str], name_by_obfuscated_name:Dict[str, str]) -> Dict[str, float]:
+    """
+    new_name_by_old_name has the names of name_cleaner ("Å" names) and name_by_obfuscated_name the original names of them.
+    Precision is counted from the found names and recall from all the obfuscated names. Names like package names are correct only if all the parts are correct.
+    """
+
+    correct_count = 0
+    found_count = 0
+    recovered_names = set()
+
+    for old_name, new_name in new_name_by_old_name.items():
+        obfuscated_names = ["Å" + x + "Å" for x in rtanks_deobfuscator.OBFUSCATED_NAME_PATTERN.findall(old_name)]
+
+        if len(obfuscated_names) == 0:
+            continue
+
+        found_count += 1
+        original_name = rtanks_deobfuscator.OBFUSCATED_NAME_PATTERN.sub(lambda x: name_by_obfuscated_name.get(x.group(0), x.group(0)), old_name)
+
+        if original_name == new_name:
+            correct_count += 1
+            recovered_names.update(obfuscated_names)
+
+    return {
+        "precision": correct_count / found_count if found_count > 0 else 0.0,
+        "recall": len(recovered_names) / len(name_by_obfuscated_name) if len(name_by_obfuscated_name) > 0 else 0.0,
+        "found_names": found_count,
+        "correct_names": correct_count,
+        "obfuscated_names": len(name_by_obfuscated_name),
+    }
+
+def run_name_cleaner(raw_target_path:str, cleaned_target_path:str) -> Dict[str, str]:
+    """
+    Returns the "Å" names by "§" names. Serial mode is used, because the worker processes wouldn't see the changed paths on windows.
+    """
+
+    name_cleaner.INPUT_SOURCE_PATH = raw_target_path
+    name_cleaner.OUTPUT_SOURCE_PATH = cleaned_target_path
+    name_cleaner.new_name_by_old_name.clear()
+    name_cleaner.old_name_by_hash_id.clear()
+    name_cleaner.new_name_bytes_by_old_name.clear()
+    name_cleaner.current_name_id = 0
+
+    name_cleaner.loop_all_files()
+
+    return dict(name_cleaner.new_name_by_old_name)
+
+def run_benchmark(class_count:int) -> Dict:
+    corpus_path = os.path.join(BENCHMARK_PATH, str(class_count))
+    reference_path = os.path.join(corpus_path, "reference")
+    raw_target_path = os.path.join(corpus_path, "target_raw")
+    cleaned_target_path = os.path.join(corpus_path, "target_cleaned")
+    deobfuscated_path = os.path.join(corpus_path, "deobfuscated")
+
+    shutil.rmtree(corpus_path, ignore_errors=True)
+
+    corpus_generator = CorpusGenerator(class_count)
+    corpus_generator.generate(reference_path, raw_target_path)
+
+    seconds_by_step = {}
+
+    start = time.perf_counter()
+    cleaned_name_by_obfuscated_name = run_name_cleaner(raw_target_path, cleaned_target_path)
+    seconds_by_step["name_cleaner"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reference_project = rtanks_deobfuscator.parse_project_sources(reference_path, sort_accesses=False)
+    target_project = rtanks_deobfuscator.parse_project_sources(cleaned_target_path, sort_accesses=False)
+    seconds_by_step["parse_project_sources"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rtanks_deobfuscator.sort_project_accesses(reference_project)
+    rtanks_deobfuscator.sort_project_accesses(target_project)
+    seconds_by_step["sort_accesses"] = time.perf_counter() - start
+
+    timed_passes = [
+        TimedPass(rtanks_deobfuscator.BasicClassAndPackageNameDeobfuscationPass(reference_project, target_project)),
+        TimedPass(rtanks_deobfuscator.FunctionNameDeobfuscationPass(reference_project, target_project, line_count_deobfudcation_enabled=True)),
+        TimedPass(rtanks_deobfuscator.VariableNameDeobfuscationPass(reference_project, target_project)),
+        TimedPass(rtanks_deobfuscator.ImportMatchingClassAndPackageNameDeobfuscationPass(reference_project, target_project)),
+    ]
+
+    deobfuscation_pass_scheduler = rtanks_deobfuscator.DeobfuscationPassScheduler(target_project, timed_passes)
+    deobfuscation_pass_scheduler.run()
+
+    for timed_pass in timed_passes:
+        seconds_by_step[type(timed_pass.deobfuscation_pass).__name__] = timed_pass.seconds
+
+    start = time.perf_counter()
+    rtanks_deobfuscator.apply_deobfuscations_to_files(cleaned_target_path, deobfuscated_path, target_project.new_name_by_old_name)
+    seconds_by_step["apply_deobfuscations_to_files"] = time.perf_counter() - start
+
+    # ground truth is for the "§" names, but the mapping has the "Å" names of name_cleaner
+    name_by_cleaned_name = {cleaned_name_by_obfuscated_name[x]:y for x, y in corpus_generator.name_by_obfuscated_name.items() if x in cleaned_name_by_obfuscated_name}
+
+    return {
+        "class_count": class_count,
+        "rounds": deobfuscation_pass_scheduler.round_count,
+        "seconds_by_step": seconds_by_step,
+        "mapping": get_precision_and_recall(target_project.new_name_by_old_name, name_by_cleaned_name),
+    }
+
+def print_result(result:Dict) -> None:
+    mapping = result["mapping"]
+
+    print(f"{result['class_count']} classes, {result['rounds']} rounds:")
+
+    for step, seconds in result["seconds_by_step"].items():
+        print(f"    {step:<55}{seconds:8.3f}s")
+
+    print(f"    precision {mapping['precision'] * 100:.1f}% ({mapping['correct_names']}/{mapping['found_names']}), recall {mapping['recall'] * 100:.1f}% of {mapping['obfuscated_names']} obfuscated names")
+
+def main() -> None:
+    results = []
+
+    for class_count in CORPUS_CLASS_COUNTS:
+        result = run_benchmark(class_count)
+        print_result(result)
+        results.append(result)
+
+    with open(os.path.join(BENCHMARK_PATH, "results.json"), "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=4)
+
+if __name__ == "__main__":
+    main()
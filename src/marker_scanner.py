@@ -0,0 +1,118 @@
+"""
+Finds the marked names ("§5L§" from the obfuscator or "Åobfuscated_name_0Å" from name_cleaner) straight from the UTF-8 bytes of a file.
+The file is searched with a bytes regex, so only the marked names are decoded. The text between them is copied as bytes,
+and a file without any markers is written back without decoding it.
+Line endings are handled like in text mode: "\\r\\n" and "\\r" are read as "\\n", and "\\n" is written as os.linesep.
+"""
+
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+import mmap
+import os
+import re
+
+MMAP_MIN_FILE_SIZE = 256 * 1024 # smaller files are read instead of memory mapping them, because mapping costs more than reading a few kilobytes
+
+def get_universal_newline_data(data):
+    """
+    Changes "\\r\\n" and "\\r" to "\\n" like Python does when a file is read as text. Data without "\\r" is returned as it is, so a memory map stays a memory map.
+    """
+
+    if data.find(b"\r") == -1:
+        return data
+
+    return data[:].replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+class MarkerScanner:
+    """
+    Markers are paired from left to right on the same line, like "Å([^Å\\n]*)Å" does for text.
+    If include_unclosed is True, a marker without a pair takes the rest of the line with the line break, like the old line by line cleaning of name_cleaner did.
+    Otherwise the marker is left as it is.
+    """
+
+    def __init__(self, marker:str, include_unclosed:bool = False) -> None:
+        self.marker:bytes = marker.encode("utf-8")
+        marker_pattern = re.escape(self.marker)
+        first_byte = re.escape(self.marker[:1])
+        other_bytes = re.escape(self.marker[1:])
+
+        # Same as "Å[^Å\n]*Å", but for a marker that can be more than one byte: any byte except "\n" and the first byte of the marker, or the first byte if the rest of the marker doesn't follow it.
+        # The marker can't be found from the middle of some other character, because utf-8 is self-synchronizing.
+        pattern = marker_pattern + b"[^" + first_byte + b"\n]*(?:" + first_byte + b"(?!" + other_bytes + b")[^" + first_byte + b"\n]*)*" + marker_pattern
+
+        if include_unclosed:
+            pattern += b"|" + marker_pattern + b".*\n?"
+
+        self.pattern:re.Pattern[bytes] = re.compile(pattern)
+
+    @contextmanager
+    def open_data(self, file_path:str) -> Iterator:
+        """
+        Gives the bytes of the file, or a memory map of it if the file is big. Line endings are changed to "\\n" like when the file is read as text.
+        """
+
+        with open(file_path, "rb") as file:
+            file_size = os.fstat(file.fileno()).st_size
+
+            if file_size < MMAP_MIN_FILE_SIZE or file_size == 0: # empty files can't be mapped
+                yield get_universal_newline_data(file.read())
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield get_universal_newline_data(data)
+
+    def write_data(self, new_file_path:str, data) -> None:
+        """
+        Writes the data with "\\n" changed to os.linesep, like when a file is written as text.
+        """
+
+        if os.linesep != "\n" and data.find(b"\n") != -1:
+            data = data[:].replace(b"\n", os.linesep.encode("utf-8")) # [:] because a memory map has no replace
+
+        with open(new_file_path, "wb") as new_file:
+            new_file.write(data)
+
+    def get_marked_names(self, file_path:str) -> Set[str]:
+        with self.open_data(file_path) as data:
+            if data.find(self.marker) == -1:
+                return set()
+
+            # the names are decoded only once, even if they are used many times in the file
+            return {x.decode("utf-8") for x in set(self.pattern.findall(data))}
+
+    def rewrite_data(self, data, get_new_name:Callable[[str], str], new_names_by_marked_name:Dict[bytes, bytes] | None = None):
+        """
+        Returns the data with every marked name replaced with get_new_name(marked name). get_new_name is called in the order the names are in the data.
+        The new names are saved to new_names_by_marked_name as bytes, so get_new_name is called only once for each name. Give the same dictionary for every file, if get_new_name always gives the same new name.
+        Data without markers is returned as it is.
+        """
+
+        if data.find(self.marker) == -1:
+            return data
+
+        if new_names_by_marked_name == None:
+            new_names_by_marked_name = {}
+
+        def get_new_name_bytes(match:re.Match) -> bytes:
+            marked_name = match.group(0)
+            new_name = new_names_by_marked_name.get(marked_name)
+
+            if new_name == None:
+                new_name = get_new_name(marked_name.decode("utf-8")).encode("utf-8")
+                new_names_by_marked_name[marked_name] = new_name
+
+            return new_name
+
+        return self.pattern.sub(get_new_name_bytes, data)
+
+    def rewrite_file(self, file_path:str, new_file_path:str, get_new_name:Callable[[str], str], new_names_by_marked_name:Dict[bytes, bytes] | None = None) -> int:
+        """
+        Writes the file to new_file_path with the names replaced like in rewrite_data. Returns the size of the file in bytes.
+        """
+
+        with self.open_data(file_path) as data:
+            self.write_data(new_file_path, self.rewrite_data(data, get_new_name, new_names_by_marked_name))
+
+            return len(data)
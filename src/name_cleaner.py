@@ -5,8 +5,11 @@ So for example "§5L§" will become "deobfuscated_name_1".
 
 # TODO: deobfuscate also the path
 
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set, Tuple
+import hashlib
 import os
+import marker_scanner
 
 INPUT_SOURCE_PATH:str = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\rtanks_sources"
 OUTPUT_SOURCE_PATH:str = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\rtanks_sources_cleaned"
@@ -16,81 +19,190 @@ ALLOWED_FILE_TYPES:List[str] = ["as"]
 NEW_NAME = "obfuscated_name"
 ENABLE_OBFUSCATED_NAME_MARKER:bool = True # will add "Å" to beginning and to end of every obfuscated name
 
+# "sequential" numbers the names in the order they are found: "obfuscated_name_0", "obfuscated_name_1" etc.
+# "hash" takes the id from hash of the obfuscated name, so one new file in the sources won't change the names in other files.
+NAMING_MODE:str = "sequential"
+NAME_HASH_LENGTH:int = 16 # length of the hash id in hex chars. The id depends only on the name, so two names with the same id stop the cleaning.
+
+# In two phase mode all the obfuscated names are first collected in parallel, then they get ids in sorted order and finally the files are written in parallel.
+# So the ids don't depend on the order in which the files are handled.
+# NOTE: the ids are not the same as in serial mode, where they are given in the order the names are found. So a tree cleaned in one mode
+# can't be mixed with mappings or caches made from a tree cleaned in the other mode. That's why this is off by default, so the old trees,
+# parse caches, mapping databases and delta mode trees still have the same names.
+ENABLE_TWO_PHASE_MODE:bool = False
+WORKER_COUNT:int = os.cpu_count() or 1
+
+# the files are scanned as bytes, so only the obfuscated names are decoded and files without them are just copied
+OBFUSCATED_NAME_SCANNER = marker_scanner.MarkerScanner(OBFUSCATION_IDENTIFIER_CHAR, include_unclosed=True)
+new_name_bytes_by_old_name:Dict[bytes, bytes] = {} # the new names as utf-8, used when the files are rewritten
+
 new_name_by_old_name:Dict[str, str] = {} 
+old_name_by_hash_id:Dict[str, str] = {}
 current_name_id = 0
 
+def get_hash_id(obfuscated_name:str) -> str:
+    """
+    The id is never made longer on a collision, because then it would depend on which of the names was found first,
+    and a new name in the next build could change the id of an old name in every file.
+    """
+
+    hash_id = hashlib.sha1(obfuscated_name.encode("utf-8")).hexdigest()[:NAME_HASH_LENGTH]
+
+    if old_name_by_hash_id.get(hash_id, obfuscated_name) != obfuscated_name:
+        raise ValueError(f"names {old_name_by_hash_id[hash_id]} and {obfuscated_name} have the same hash id {hash_id}, make NAME_HASH_LENGTH longer")
+
+    old_name_by_hash_id[hash_id] = obfuscated_name
+    return hash_id
+
 def deobfuscate_name(obfuscated_name:str) -> str:
     global current_name_id
 
     if obfuscated_name in new_name_by_old_name:
         return new_name_by_old_name[obfuscated_name]
     else:
+        if NAMING_MODE == "hash":
+            name_id = get_hash_id(obfuscated_name)
+        else:
+            name_id = str(current_name_id)
+            current_name_id += 1
+
         if ENABLE_OBFUSCATED_NAME_MARKER:
-            new_name = "Å" + NEW_NAME + "_" + str(current_name_id) + "Å"
+            new_name = "Å" + NEW_NAME + "_" + name_id + "Å"
         else:
-            new_name = NEW_NAME + "_" + str(current_name_id)
+            new_name = NEW_NAME + "_" + name_id
 
-        current_name_id += 1
         new_name_by_old_name[obfuscated_name] = new_name
         return new_name
 
-def edit_line(line:str) -> str:
-    global current_name_id
-    obfuscated_names = []
-    inside_obfuscated_name = False
+def get_obfuscated_file_name_part(file_name:str) -> str | None:
+    if file_name[0] == OBFUSCATION_IDENTIFIER_CHAR:
+        return "".join(file_name.split(".")[:-1])
 
-    for char in line:
-        if char == OBFUSCATION_IDENTIFIER_CHAR:
-            inside_obfuscated_name = not inside_obfuscated_name
-            
-            if inside_obfuscated_name:
-                obfuscated_names.append("")
-            else:
-                obfuscated_names[-1] += OBFUSCATION_IDENTIFIER_CHAR
+    return None
 
-        if inside_obfuscated_name:
-            obfuscated_names[-1] += char
+def get_obfuscated_folder_names(path:str) -> List[str]:
+    return [x for x in path.split("/") if x.startswith(OBFUSCATION_IDENTIFIER_CHAR)]
 
-    for obfuscated_name in obfuscated_names:
-        new_name = deobfuscate_name(obfuscated_name)
-        line = line.replace(obfuscated_name, new_name)
+def get_new_file_path(dir_relative_path:str, file_name:str, output_source_path:str | None = None) -> Tuple[str, str]:
+    """
+    Returns the new directory and new file name. The new directory will be under OUTPUT_SOURCE_PATH, if output_source_path is not given.
+    """
 
-    return line
+    if output_source_path == None:
+        output_source_path = OUTPUT_SOURCE_PATH
 
-def create_modified_file(dir_relative_path:str, file_name) -> None:
-    new_text = ""
+    obfuscated_part = get_obfuscated_file_name_part(file_name)
 
-    with open(INPUT_SOURCE_PATH + dir_relative_path + "\\" + file_name, "r", encoding="utf-8") as file:
-        for line in file:
-            new_text += edit_line(line)
-
-    if file_name[0] == OBFUSCATION_IDENTIFIER_CHAR:
-        obfuscated_part = "".join(file_name.split(".")[:-1])
+    if obfuscated_part != None:
         file_name = file_name.replace(obfuscated_part, deobfuscate_name(obfuscated_part))
 
-    new_path = (OUTPUT_SOURCE_PATH + dir_relative_path).replace("\\", "/")
-
-    for folder_name in new_path.split("/"):
-        if not folder_name[0] == OBFUSCATION_IDENTIFIER_CHAR:
-            continue
+    new_path = (output_source_path + dir_relative_path).replace(os.sep, "/")
 
+    for folder_name in get_obfuscated_folder_names(new_path):
         deobfuscated_folder_name = deobfuscate_name(folder_name)
         new_path = new_path.replace(folder_name, deobfuscated_folder_name)
 
-    os.makedirs(new_path, exist_ok=True)
+    return new_path, file_name
 
-    with open(new_path + "\\" + file_name, 'w', encoding="utf-8") as file:
-        file.write(new_text)
+def create_modified_file(dir_relative_path:str, file_name) -> None:
+    with OBFUSCATED_NAME_SCANNER.open_data(INPUT_SOURCE_PATH + dir_relative_path + os.sep + file_name) as data:
+        # The names in the file are renamed before the file and folder names, so in serial mode they get the same ids as always.
+        # In two phase mode the names already have ids, so the order doesn't matter.
+        new_data = OBFUSCATED_NAME_SCANNER.rewrite_data(data, deobfuscate_name, new_name_bytes_by_old_name)
+        new_path, new_file_name = get_new_file_path(dir_relative_path, file_name)
+
+        os.makedirs(new_path, exist_ok=True)
+
+        OBFUSCATED_NAME_SCANNER.write_data(new_path + os.sep + new_file_name, new_data)
+
+def clean_files_in_memory() -> Dict[str, str]:
+    """
+    Cleans all the files without writing anything. Returns the cleaned texts by cleaned relative file paths, for example "\\Åobfuscated_name_0Å\\Åobfuscated_name_1Å.as".
+    """
+
+    cleaned_texts_by_relative_path = {}
+    files_to_clean = get_files()
+
+    # the names get the same ids as when the files are written, so the fused pipeline and the file pipeline give the same names
+    if ENABLE_TWO_PHASE_MODE:
+        give_ids_in_sorted_order(files_to_clean)
+
+    for dir_relative_path, file_name in files_to_clean:
+        with OBFUSCATED_NAME_SCANNER.open_data(INPUT_SOURCE_PATH + dir_relative_path + os.sep + file_name) as data:
+            cleaned_text = OBFUSCATED_NAME_SCANNER.rewrite_data(data, deobfuscate_name, new_name_bytes_by_old_name)[:].decode("utf-8") # [:] because a memory map can't be decoded
+
+        new_path, new_file_name = get_new_file_path(dir_relative_path, file_name, "")
+
+        cleaned_texts_by_relative_path[(new_path + os.sep + new_file_name).replace("/", os.sep)] = cleaned_text
+
+    return cleaned_texts_by_relative_path
+
+def collect_obfuscated_names(dir_relative_path:str, file_name:str) -> Set[str]:
+    obfuscated_names = OBFUSCATED_NAME_SCANNER.get_marked_names(INPUT_SOURCE_PATH + dir_relative_path + os.sep + file_name)
+
+    obfuscated_part = get_obfuscated_file_name_part(file_name)
+
+    if obfuscated_part != None:
+        obfuscated_names.add(obfuscated_part)
+
+    obfuscated_names.update(get_obfuscated_folder_names((OUTPUT_SOURCE_PATH + dir_relative_path).replace(os.sep, "/")))
+
+    return obfuscated_names
+
+def get_files() -> List[Tuple[str, str]]:
+    """
+    Returns relative directory path and file name of every file that should be cleaned.
+    """
+
+    files_to_clean = []
 
-def loop_all_files() -> None:
     for root, directories, files in os.walk(INPUT_SOURCE_PATH):
         for filename in files:
             if not filename.split(".")[-1] in ALLOWED_FILE_TYPES:
                 continue
 
-            file_path = os.path.join(root, filename)
             dir_relative_path = root.replace(INPUT_SOURCE_PATH, "")
-            create_modified_file(dir_relative_path, filename)
+            files_to_clean.append((dir_relative_path, filename))
+
+    return files_to_clean
+
+def set_new_names(new_names:Dict[str, str]) -> None:
+    """
+    Used to give the assigned names to worker processes.
+    """
+
+    new_name_by_old_name.update(new_names)
+
+def loop_all_files() -> None:
+    for dir_relative_path, filename in get_files():
+        create_modified_file(dir_relative_path, filename)
+
+def give_ids_in_sorted_order(files_to_clean:List[Tuple[str, str]]) -> None:
+    """
+    First phase of two phase mode. Collects the obfuscated names of every file in parallel and gives them ids in sorted order.
+    """
+
+    dir_relative_paths = [x[0] for x in files_to_clean]
+    file_names = [x[1] for x in files_to_clean]
+
+    with ProcessPoolExecutor(max_workers=WORKER_COUNT) as executor:
+        obfuscated_name_sets = list(executor.map(collect_obfuscated_names, dir_relative_paths, file_names))
+
+    for obfuscated_name in sorted(set().union(*obfuscated_name_sets)):
+        deobfuscate_name(obfuscated_name)
+
+def loop_all_files_in_two_phases() -> None:
+    files_to_clean = get_files()
+    dir_relative_paths = [x[0] for x in files_to_clean]
+    file_names = [x[1] for x in files_to_clean]
+
+    give_ids_in_sorted_order(files_to_clean)
+
+    with ProcessPoolExecutor(max_workers=WORKER_COUNT, initializer=set_new_names, initargs=(new_name_by_old_name,)) as executor:
+        list(executor.map(create_modified_file, dir_relative_paths, file_names))
 
 if __name__ == "__main__":
-    loop_all_files()
+    if ENABLE_TWO_PHASE_MODE:
+        loop_all_files_in_two_phases()
+    else:
+        loop_all_files()
@@ -1,15 +1,43 @@
+from bisect import bisect_left, bisect_right
 from collections.abc import Callable
-from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from os.path import join
-from typing import Dict, List, IO
+from typing import Dict, List, IO, Set
 
 import os
+import re
+import time
 import json
+import functools
+import hashlib
+import pickle
+import random
+import sqlite3
+import sys
+import tracemalloc
+import marker_scanner
+import name_cleaner
 from typing_extensions import Tuple
 import pyperclip # NOTE: Only used in debugging. So remove if you want.
 
+try:
+    import psutil # only used to report peak memory usage on windows
+except ImportError:
+    psutil = None
+
+try:
+    import resource # only used to report peak memory usage, doesn't exist on windows
+except ImportError:
+    resource = None
+
+try:
+    import numpy # only needed for the project snapshots
+except ImportError:
+    numpy = None
+
 ALLOWED_FILE_TYPES:List[str] = ["as"]
-DEFAULT_DEOBFUSCATED_NAME = "Åobfuscated_nameÅ"
+DEFAULT_DEOBFUSCATED_NAME = "Å" + name_cleaner.NEW_NAME # every name that name_cleaner marks starts with this, for example "Åobfuscated_name_12Å"
 TEST_SOURCE_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\test_data"
 
 # Names are taken from the reference project. So when we are deobfuscating rtanks, this path should countain mytanks sources.
@@ -20,18 +48,198 @@ TARGET_PROJECT_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\
 
 DEOBFUSCATED_CODE_SAVE_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\rtanks_sources_deobfuscated"
 
+# If enabled, the raw "§" sources from name_cleaner.INPUT_SOURCE_PATH are cleaned in memory and the cleaned texts are used directly for parsing and for writing the deobfuscated files.
+# So TARGET_PROJECT_PATH is not needed and name_cleaner doesn't have to be run separately.
+ENABLE_FUSED_PIPELINE = False
+
+# Parsed files are cached here, so unchanged files (mostly the reference project) don't have to be parsed again on every run.
+PARSE_CACHE_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\parse_cache"
+PARSE_CACHE_ENABLED = True
+PARSE_CACHE_SIZE_LIMIT = 512 * 1024 * 1024 # in bytes. Least recently used entries are removed when the cache grows bigger than this.
+PARSER_VERSION = 8 # NOTE: increase this every time when ActionScriptFileParser output changes, so old cache entries won't be used.
+
+# Found names are saved here with the pass and round that found them.
+# A run can continue from the names of the same build, or start from the names of an older build. Then only the files that still have obfuscated names are handled in the first round.
+MAPPING_DATABASE_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\mappings.sqlite"
+MAPPING_DATABASE_ENABLED = True
+MAPPING_DATABASE_BUILD = "rtanks" # name of the client build that is deobfuscated, names are saved under this
+MAPPING_DATABASE_RESUME = False # load the names that were saved under MAPPING_DATABASE_BUILD
+MAPPING_DATABASE_SEED_BUILD:str | None = None # load the names of this build first. NOTE: only useful if the obfuscated names are same in both builds, so use name_cleaner's "hash" naming mode
+
+# Delta mode compares the target project against the cleaned sources of the previous build. Names of the files that only have different obfuscated names are
+# copied from the previous build's names in the mapping database, and the passes start only from the files that really changed. Needs MAPPING_DATABASE_ENABLED.
+# NOTE: the previous build is the cleaned tree, not the raw "§" tree, because the mapping database has the previous build's names as the "Åobfuscated_name_12Å" names
+# of that tree. Cleaning the raw tree again would give the same names only if name_cleaner numbered them the same way, and the passes only recognize the marked names.
+ENABLE_DELTA_MODE = False
+PREVIOUS_BUILD_PROJECT_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\rtanks_sources_cleaned_previous"
+PREVIOUS_BUILD_NAME = "rtanks_previous" # names of the previous build are loaded from the mapping database with this build name
+
+# Profiling writes a JSON report with the time, call counts and found names of parsing, every pass and applying the names.
+# When disabled nothing is wrapped, so it doesn't slow down the normal runs at all.
+ENABLE_PROFILING = False
+PROFILING_REPORT_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\profiling_report.json"
+
+# Progress events are written as JSON lines while the run goes on: one per parsed file, per pass in every round and per written file,
+# and a progress event with throughput and ETA every PROGRESS_EVENT_INTERVAL seconds. Use "tail -f" to follow the file.
+ENABLE_PROGRESS_EVENTS = False
+PROGRESS_EVENTS_PATH:str | None = None # None writes the events to stderr
+PROGRESS_EVENT_INTERVAL = 1.0 # in seconds
+
 FUNCTION_LINE_COUNT_TOLERANCE = 2
+
+# Fuzzy class matching is run once after the other passes are done. It finds the classes that were edited a bit, so the counts don't match anymore.
+ENABLE_FUZZY_CLASS_MATCHING = False
+FUZZY_CLASS_MATCHING_MIN_SIMILARITY = 0.8 # jaccard similarity of the file features, matches below this are only printed
+FUZZY_MINHASH_BAND_COUNT = 16
+FUZZY_MINHASH_ROWS_PER_BAND = 4 # minhash signature length is band count * rows per band. More rows means that less similar files are not compared at all.
+FUZZY_LINE_COUNT_BINS = [1, 2, 4, 8, 16, 32, 64, 128] # function line counts are compared by these bins, so small changes in a function don't change its feature
+
+MAX_DEOBFUSCATION_ROUND_COUNT = 20 # the passes are run until they don't find new names, but never more than this many rounds
+PARSE_WORKER_COUNT = os.cpu_count() or 1 # how many processes are used to parse project sources. 1 will parse the files serially.
+# If enabled, parsing only saves the offsets of the function bodies and keeps the file text. When a pass needs the accessers of a file, only the bodies of that file
+# and of the files that can access it are parsed (ProjectSources.prepare_accessers_of). Parsing is faster then, but the text of a file is kept in memory until its bodies are parsed.
+# The scheduler doesn't parse anything either, it adds the accesser names of a file to its index only after some pass has prepared them.
+LAZY_FUNCTION_BODY_PARSING = False
+
+# The parsed projects can be saved as numpy arrays, so other tools can load or memory map them without running the parser. See ProjectSnapshot.
+EXPORT_PROJECT_SNAPSHOTS = False
+PROJECT_SNAPSHOT_PATH = r"D:\juho1\tankkin_modaus\rtanks\python\deobfuscator\data\project_snapshots" # the projects are saved to "reference" and "target" folders under this
+APPLY_WORKER_COUNT = 8 # how many threads are used to write the deobfuscated files. 1 will write the files serially.
+OBFUSCATED_NAME_PATTERN = re.compile("Å([^Å\n]*)Å") # matches the "Å" markers pairwise on the same line, like the name_cleaner adds them
+OBFUSCATED_NAME_SCANNER = marker_scanner.MarkerScanner("Å") # same as OBFUSCATED_NAME_PATTERN, but for the bytes of the files
 OPENING_BRACE = "()"[0] # the "()"[0] is for my stupid lsp which will freak out if i dont close open parenthesis in string
 CLOSING_BRACE = "()"[1] # the "()"[1] is for my stupid lsp which will freak out if i dont close open parenthesis in string
-
-
-@dataclass
+OPENING_CURLY_BRACE = "{}"[0] # the "{}"[0] is for my stupid lsp which will freak out if i dont close open parenthesis in string
+CLOSING_CURLY_BRACE = "{}"[1] # the "{}"[1] is for my stupid lsp which will freak out if i dont close open parenthesis in string
+
+CLOSING_TEXT_BY_OPENING_TEXT = {OPENING_BRACE:CLOSING_BRACE, "[":"]", OPENING_CURLY_BRACE:CLOSING_CURLY_BRACE}
+ACTION_SCRIPT_KEYWORDS = frozenset(["package", "import", "class", "var", "function", "interface"]) # the keywords that ActionScriptFileParser handles
+ACTION_SCRIPT_TOKEN_PATTERN = re.compile(r"""
+    [\w$]+                                 # identifiers and numbers
+    |\n
+    |//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)          # comments
+    |"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'   # strings
+    |\.\.\.
+    |\S                                     # punctuation
+""", re.VERBOSE)
+ACTION_SCRIPT_TOKEN_WITH_WHITESPACE_PATTERN = re.compile(ACTION_SCRIPT_TOKEN_PATTERN.pattern + "|[^\\S\\n]+", re.VERBOSE) # matches every character of the text, so the token offsets can be counted
+
+
+@dataclass(frozen = True, slots = True)
 class Accesser:
+    """
+    Don't create these directly, use SYMBOL_TABLE.get_accesser so equal accessers are the same object.
+    """
+
     package_name:str = ""
     file_name:str = ""
     name:str = "" # bassically variable or function name
 
 
+class SymbolTable:
+    """
+    There is a huge amount of accessers when both projects are loaded and most of them are the same few
+    (package, file, function) combinations. So every distinct accesser is stored only once with interned strings
+    and the accessers lists only hold references to the shared objects.
+    The names in the symbol records are interned too, because the same types and imports are repeated in almost every file.
+    """
+
+    def __init__(self) -> None:
+        self.accessers:Dict[Accesser, Accesser] = {} # the accesser itself is the key, so no extra key tuples are stored
+        self.reference_count = 0
+        self.duplicate_count = 0
+
+    def get_accesser(self, package_name:str, file_name:str, name:str) -> Accesser:
+        accesser = Accesser(
+            package_name = sys.intern(package_name),
+            file_name = sys.intern(file_name),
+            name = sys.intern(name)
+        )
+
+        return self.accessers.setdefault(accesser, accesser)
+
+    def compact_accessers(self, accessers:List[Accesser]) -> Tuple[Accesser, ...]:
+        """
+        Replaces the accessers with the shared ones and drops the repeated ones. The order of the first occurrences is kept.
+        Returns a tuple, because most of the datas don't have any accessers and all the empty tuples are the same object.
+        """
+
+        compacted_accessers = tuple(dict.fromkeys(self.get_accesser(x.package_name, x.file_name, x.name) for x in accessers))
+
+        self.reference_count += len(compacted_accessers)
+        self.duplicate_count += len(accessers) - len(compacted_accessers)
+
+        return compacted_accessers
+
+    def intern_AS_parser(self, AS_parser:"ActionScriptFileParser") -> None:
+        """
+        The parsers come from worker processes or from the parse cache, so their strings are not shared between files before this.
+        parse_project_sources calls this for every parser as soon as it gets it, so the repeated strings of one file are freed before all the files are parsed.
+        """
+
+        intern = sys.intern
+
+        AS_parser.package_name = intern(AS_parser.package_name)
+        AS_parser.file_name = intern(AS_parser.file_name)
+
+        for import_data in AS_parser.import_datas:
+            import_data.import_string = intern(import_data.import_string)
+
+        for class_data in AS_parser.class_datas:
+            class_data.name = intern(class_data.name)
+            class_data.extends = intern(class_data.extends)
+            class_data.visibility = intern(class_data.visibility)
+            class_data.implements = [intern(x) for x in class_data.implements]
+
+        for interface_data in AS_parser.interface_datas:
+            interface_data.name = intern(interface_data.name)
+            interface_data.visibility = intern(interface_data.visibility)
+
+        for var_data in AS_parser.global_var_datas:
+            var_data.name = intern(var_data.name)
+            var_data.visibility = intern(var_data.visibility)
+            var_data.type = intern(var_data.type)
+
+        for access_data in AS_parser.access_datas:
+            access_data.accessed_class_name_and_package = intern(access_data.accessed_class_name_and_package)
+            access_data.function_name = intern(access_data.function_name)
+            access_data.sub_accesses = [intern(x) for x in access_data.sub_accesses]
+
+        for function_data in AS_parser.function_datas:
+            function_data.name = intern(function_data.name)
+            function_data.visibility = intern(function_data.visibility)
+            function_data.return_type = intern(function_data.return_type)
+            function_data.setter_getter = intern(function_data.setter_getter)
+            function_data.param_names = [intern(x) for x in function_data.param_names]
+            function_data.param_types = [intern(x) for x in function_data.param_types]
+
+        # the dictionary keys are separate strings, so they have to be replaced too or the old strings stay alive
+        AS_parser.import_datas_by_import_string = {intern(k):v for k, v in AS_parser.import_datas_by_import_string.items()}
+        AS_parser.import_string_by_class_name = {intern(k):intern(v) for k, v in AS_parser.import_string_by_class_name.items()}
+        AS_parser.global_var_datas_by_name = {intern(k):v for k, v in AS_parser.global_var_datas_by_name.items()}
+        AS_parser.function_datas_by_name = {intern(k):v for k, v in AS_parser.function_datas_by_name.items()}
+
+    def compact_AS_parser(self, AS_parser:"ActionScriptFileParser") -> None:
+        """
+        NOTE: after this the accessers of the file can't be appended anymore, so this should be done only when every body that can access the file is sorted.
+        The strings are already interned by parse_project_sources.
+        """
+
+        for data in AS_parser.import_datas + AS_parser.global_var_datas + AS_parser.function_datas:
+            data.accessers = self.compact_accessers(data.accessers)
+
+    def print_summary(self) -> None:
+        print(f"accessers: {len(self.accessers)} unique, {self.reference_count} references, {self.duplicate_count} duplicates removed")
+
+        peak_memory_usage = Utils.get_peak_memory_usage()
+
+        if peak_memory_usage != None:
+            print(f"peak memory usage: {peak_memory_usage:.1f} MB")
+
+
+SYMBOL_TABLE = SymbolTable()
+
+
 class Utils:
     @staticmethod
     def within_tolerance(num1:int, num2:int, tolerance:int) -> bool:
@@ -41,6 +249,29 @@ class Utils:
     def is_obfuscated(text:str) -> bool:
         return DEFAULT_DEOBFUSCATED_NAME in text
 
+    @staticmethod
+    def get_peak_memory_usage() -> float | None:
+        """
+        Peak memory usage of this process in megabytes. On windows psutil is needed for this. Without it only the peak of the python allocations
+        is known, and only if tracemalloc is running (the profiler starts it). Returns None if neither works.
+        """
+
+        if psutil != None and hasattr(psutil.Process().memory_info(), "peak_wset"):
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024) # peak working set, only on windows
+
+        if resource != None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            if sys.platform == "darwin":
+                return max_rss / (1024 * 1024) # in bytes on macos
+
+            return max_rss / 1024 # in kilobytes on linux
+
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+        return None
+
 
 @dataclass
 class ActionScriptClassData:
@@ -63,7 +294,7 @@ class ActionScriptVarData:
     type:str
     static:bool
     value:str;
-    accessers:List[Accesser] = field(default_factory=list)
+    accessers:Tuple[Accesser, ...] | List[Accesser] = field(default_factory=list) # list while parsing, SymbolTable.compact_AS_parser makes it a tuple
 
 
 @dataclass
@@ -76,7 +307,20 @@ class ActionScriptFunctionData:
     param_types:List[str]
     line_count:int
     setter_getter:str
-    accessers:List[Accesser] = field(default_factory=list)
+    accessers:Tuple[Accesser, ...] | List[Accesser] = field(default_factory=list) # list while parsing, SymbolTable.compact_AS_parser makes it a tuple
+
+
+@dataclass
+class ActionScriptFunctionBody:
+    """
+    Function body that is not parsed yet. start is offset of the "{" in the file text and end is offset after the closing "}".
+    class_name is the class that the function is in, so "this" in the body means that class. It's None for functions outside classes.
+    """
+
+    function_name:str
+    class_name:str | None
+    start:int
+    end:int
 
 
 @dataclass
@@ -97,7 +341,7 @@ class ActionScriptAccessData:
 @dataclass
 class ActionScriptImportDatas:
     import_string:str
-    accessers:List[Accesser] = field(default_factory=list)
+    accessers:Tuple[Accesser, ...] | List[Accesser] = field(default_factory=list) # list while parsing, SymbolTable.compact_AS_parser makes it a tuple
 
 
 class ProjectSources:
@@ -105,6 +349,70 @@ class ProjectSources:
         self.actionscript_file_parsers:List[ActionScriptFileParser] = []
         self.actionscript_file_parsers_by_class_name_and_package:Dict[str, ActionScriptFileParser] = {} # Example: {"some.package.ExampleClass":ActionScriptFileParser()}
         self.new_name_by_old_name:Dict[str, str] = {}
+        self.accesses_sorted:bool = False
+        self.AS_parsers_with_accessers:Set[ActionScriptFileParser] = set() # files that prepare_accessers_of has handled before the whole project was sorted
+        self.accessing_AS_parsers_by_AS_parser:Dict[ActionScriptFileParser, List[ActionScriptFileParser]] | None = None
+
+    def prepare_accessers(self) -> None:
+        """
+        Call this before using the accessers of every file. If the files were parsed lazily, the function bodies are parsed and the accesses are sorted on the first call.
+        """
+
+        if not self.accesses_sorted:
+            sort_project_accesses(self)
+
+    def prepare_accessers_of(self, AS_parser:"ActionScriptFileParser") -> None:
+        """
+        Call this before using the accessers of AS_parser. If the files were parsed lazily, only the function bodies of AS_parser and the files that can access it are parsed.
+        The accessers are the same as after prepare_accessers.
+        """
+
+        if self.accesses_sorted or AS_parser in self.AS_parsers_with_accessers:
+            return
+
+        accessing_AS_parsers = self.get_accessing_AS_parsers(AS_parser)
+
+        # parse_function_bodies does nothing for the files whose bodies are already parsed
+        for accessing_AS_parser in accessing_AS_parsers:
+            accessing_AS_parser.parse_function_bodies()
+
+        # in project order like in sort_project_accesses, so the accessers are in the same order
+        for accessing_AS_parser in accessing_AS_parsers:
+            accessing_AS_parser.sort_accesses(self, {AS_parser})
+
+        SYMBOL_TABLE.compact_AS_parser(AS_parser)
+        self.AS_parsers_with_accessers.add(AS_parser)
+
+    def has_accessers(self, AS_parser:"ActionScriptFileParser") -> bool:
+        return self.accesses_sorted or AS_parser in self.AS_parsers_with_accessers
+
+    def get_accessing_AS_parsers(self, AS_parser:"ActionScriptFileParser") -> List["ActionScriptFileParser"]:
+        """
+        Returns AS_parser and the files whose function bodies can access it, in project order. A body can only access its own class and the classes that its file imports.
+        """
+
+        if self.accessing_AS_parsers_by_AS_parser == None:
+            self.accessing_AS_parsers_by_AS_parser = {}
+
+            for accessing_AS_parser in self.actionscript_file_parsers:
+                class_names_and_packages = [x.import_string for x in accessing_AS_parser.import_datas]
+                class_names_and_packages += [accessing_AS_parser.package_name + "." + x.name for x in accessing_AS_parser.class_datas]
+                accessed_AS_parsers = {accessing_AS_parser} # the file itself is always there, because the bodies add the accessers of its imports
+
+                for class_name_and_package in class_names_and_packages:
+                    if class_name_and_package in self.actionscript_file_parsers_by_class_name_and_package:
+                        accessed_AS_parsers.add(self.actionscript_file_parsers_by_class_name_and_package[class_name_and_package])
+
+                for accessed_AS_parser in accessed_AS_parsers:
+                    self.accessing_AS_parsers_by_AS_parser.setdefault(accessed_AS_parser, []).append(accessing_AS_parser)
+
+        return self.accessing_AS_parsers_by_AS_parser.get(AS_parser, [AS_parser])
+
+    def add_actionscript_file_parser(self, as_file_parser:"ActionScriptFileParser") -> None:
+        self.actionscript_file_parsers.append(as_file_parser)
+
+        for class_data in as_file_parser.class_datas:
+            self.actionscript_file_parsers_by_class_name_and_package[as_file_parser.package_name + "." + class_data.name] = as_file_parser
 
     def is_name_already_deobfuscated(self, name:str) -> bool:
         return name in self.new_name_by_old_name
@@ -132,8 +440,98 @@ class ProjectSources:
         return new_names
 
 
+class ActionScriptTokens:
+    """
+    Token texts and line numbers of one file. These are two lists instead of list of token objects, because creating an object for every token is slow.
+    """
+
+    def __init__(self) -> None:
+        self.texts:List[str] = []
+        self.lines:List[int] = []
+        self.offsets:List[int] = [] # only filled by tokenize_action_script_with_offsets
+
+
+def is_identifier(text:str) -> bool:
+    return text != "" and (text[0].isalpha() or text[0] == "_" or text[0] == "$")
+
+def tokenize_action_script(text:str) -> ActionScriptTokens:
+    """
+    Splits the text to identifiers, numbers, strings and punctuation in one pass. Whitespace and comments are skipped.
+    """
+
+    tokens = ActionScriptTokens()
+    texts = tokens.texts
+    lines = tokens.lines
+
+    line = 0
+
+    for token_text in ACTION_SCRIPT_TOKEN_PATTERN.findall(text):
+        first_char = token_text[0]
+
+        if first_char == "\n":
+            line += 1
+            continue
+
+        # comments
+        if first_char == "/" and len(token_text) > 1 and (token_text[1] == "/" or token_text[1] == "*"):
+            line += token_text.count("\n")
+            continue
+
+        texts.append(token_text)
+        lines.append(line)
+
+    return tokens
+
+def tokenize_action_script_with_offsets(text:str) -> ActionScriptTokens:
+    """
+    Same as tokenize_action_script, but also saves the offset of every token in the text. This is slower, because the whitespace has to be matched too.
+    """
+
+    tokens = ActionScriptTokens()
+    texts = tokens.texts
+    lines = tokens.lines
+    offsets = tokens.offsets
+
+    line = 0
+    offset = 0
+
+    for token_text in ACTION_SCRIPT_TOKEN_WITH_WHITESPACE_PATTERN.findall(text):
+        first_char = token_text[0]
+        token_offset = offset
+        offset += len(token_text)
+
+        if first_char == "\n":
+            line += 1
+            continue
+
+        if first_char.isspace():
+            continue
+
+        # comments
+        if first_char == "/" and len(token_text) > 1 and (token_text[1] == "/" or token_text[1] == "*"):
+            line += token_text.count("\n")
+            continue
+
+        texts.append(token_text)
+        lines.append(line)
+        offsets.append(token_offset)
+
+    return tokens
+
+
+def read_action_script_file(file_path:str) -> str:
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
 class ActionScriptFileParser:
-    def __init__(self, file_path:str) -> None:
+    def __init__(self, file_path:str | None, text:str | None = None, lazy_function_bodies:bool = False) -> None:
+        """
+        If text is given, it is parsed instead of reading the file from file_path.
+        If lazy_function_bodies is True, the function bodies are not parsed before parse_function_bodies is called.
+        If file_path is None, nothing is parsed and the datas are filled by the caller (ProjectSnapshot does this).
+        """
+
         self.package_name:str = ""
         self.file_name:str = ""
         #self.imports:List[str] = []
@@ -143,11 +541,18 @@ class ActionScriptFileParser:
         self.global_var_datas:List[ActionScriptVarData] = []
         self.function_datas:List[ActionScriptFunctionData] = []
         self.access_datas:List[ActionScriptAccessData] = []
+        self.resolved_accesses:Dict[ActionScriptFileParser, List[Tuple[ActionScriptVarData | ActionScriptFunctionData, Accesser]]] | None = None # made from access_datas by get_resolved_accesses
         self.import_datas_by_import_string:Dict[str, ActionScriptImportDatas] = {}
+        self.import_string_by_class_name:Dict[str, str] = {}
+        self.duplicate_imported_class_names:Set[str] = set() # short names imported from more than one package
         self.global_var_datas_by_name:Dict[str, ActionScriptVarData] = {}
         self.function_datas_by_name:Dict[str, ActionScriptFunctionData] = {}
+        self.lazy_function_bodies:bool = lazy_function_bodies
+        self.unparsed_function_bodies:List[ActionScriptFunctionBody] = []
+        self.text:str | None = None # only kept until the lazy function bodies are parsed
 
-        self.parse_file(file_path)
+        if file_path != None:
+            self.parse_file(file_path, text)
 
     def get_as_dictionary(self) -> Dict:
         import_datas = [str(x) for x in self.import_datas]
@@ -168,96 +573,260 @@ class ActionScriptFileParser:
             "access_datas":access_datas,
         }
 
-    def try_add_import_accesser(self, class_name:str, name:str) -> None:
-        imported_classes = [x.import_string.split(".")[-1] for x in self.import_datas]
+    def get_data_records(self) -> Tuple:
+        """
+        Everything that was found from the file, without the lookup dictionaries and the text. The parse cache pickles only these.
+        """
 
-        if class_name in imported_classes:
-            import_string = self.import_datas[imported_classes.index(class_name)].import_string
+        return (
+            self.package_name,
+            self.file_name,
+            self.import_datas,
+            self.class_datas,
+            self.interface_datas,
+            self.global_var_datas,
+            self.function_datas,
+            self.access_datas,
+            self.lazy_function_bodies,
+            self.unparsed_function_bodies,
+        )
 
-            accesser = Accesser(
-                name = name,
-                package_name = self.package_name,
-                file_name = self.file_name
-            )
+    @staticmethod
+    def from_data_records(data_records:Tuple, text:str | None = None) -> "ActionScriptFileParser":
+        """
+        Makes the parser from get_data_records() output. text is only needed if the function bodies are not parsed yet.
+        """
+
+        AS_parser = ActionScriptFileParser(None)
+        package_name, file_name, import_datas, class_datas, interface_datas, global_var_datas, function_datas, access_datas, lazy_function_bodies, unparsed_function_bodies = data_records
+
+        AS_parser.package_name = package_name
+        AS_parser.file_name = file_name
+        AS_parser.class_datas = class_datas
+        AS_parser.interface_datas = interface_datas
+        AS_parser.access_datas = access_datas
+        AS_parser.lazy_function_bodies = lazy_function_bodies
+        AS_parser.unparsed_function_bodies = unparsed_function_bodies
+
+        # the lookup dictionaries are filled in the same order as when parsing, so the same data wins for repeated names
+        for import_data in import_datas:
+            AS_parser.add_import_data(import_data)
+
+        for var_data in global_var_datas:
+            AS_parser.global_var_datas.append(var_data)
+            AS_parser.global_var_datas_by_name[var_data.name] = var_data
+
+        for function_data in function_datas:
+            AS_parser.function_datas.append(function_data)
+            AS_parser.function_datas_by_name[function_data.name] = function_data
+
+        if unparsed_function_bodies:
+            AS_parser.text = text
+
+        return AS_parser
+
+    def get_import_string(self, class_name:str) -> str | None:
+        """
+        Short class name -> full import string. If the same short name is imported more than once, the first import wins.
+        """
+
+        return self.import_string_by_class_name.get(class_name)
+
+    def try_add_import_accesser(self, class_name:str, name:str) -> None:
+        import_string = self.get_import_string(class_name)
+
+        if import_string != None:
+            accesser = SYMBOL_TABLE.get_accesser(self.package_name, self.file_name, name)
 
             self.import_datas_by_import_string[import_string].accessers.append(accesser)
 
-    def parse_package(self, line_splitted_by_space:List[str], word_index:int) -> None:
-        if word_index + 1 < len(line_splitted_by_space):
-            self.package_name = line_splitted_by_space[word_index + 1]
+    def parse_qualified_name(self, tokens:ActionScriptTokens, index:int) -> Tuple[str, int]:
+        """
+        Reads names like "some.package.SomeClass", "some.package.*" or "Vector.<some.package.SomeClass>" starting from index.
+        Returns the name and index of the first token after the name.
+        """
 
-    def parse_import(self, line_splitted_by_space:List[str], word_index:int) -> None:
-        import_data = ActionScriptImportDatas(
-            import_string = line_splitted_by_space[word_index + 1][:-1]
-        )
+        texts = tokens.texts
+        name = ""
+
+        while index < len(texts):
+            text = texts[index]
+
+            if not is_identifier(text) and text != "*":
+                break
+
+            name += text
+            index += 1
+
+            if index + 1 >= len(texts) or texts[index] != ".":
+                break
+
+            if texts[index + 1] == "<":
+                type_parameter, index = self.parse_qualified_name(tokens, index + 2)
+                name += ".<" + type_parameter + ">"
+
+                if index < len(texts) and texts[index] == ">":
+                    index += 1
+
+                break
+
+            name += "."
+            index += 1
+
+        return name, index
+
+    def parse_type(self, tokens:ActionScriptTokens, index:int) -> Tuple[str, int]:
+        """
+        Reads the type after ":" if there is one. Returns the type ("" if there is no type) and index of the first token after it.
+        """
+
+        if index < len(tokens.texts) and tokens.texts[index] == ":":
+            return self.parse_qualified_name(tokens, index + 1)
+
+        return "", index
+
+    def get_modifiers(self, tokens:ActionScriptTokens, index:int) -> List[str]:
+        """
+        Returns the words before the keyword at index, for example ["public", "static"] for "public static var".
+        """
+
+        modifiers_start_index = index
+
+        while modifiers_start_index > 0 and is_identifier(tokens.texts[modifiers_start_index - 1]):
+            modifiers_start_index -= 1
+
+        return tokens.texts[modifiers_start_index:index]
+
+    def find_matching_closing_token(self, tokens:ActionScriptTokens, index:int) -> int:
+        """
+        index should point to "(", "[" or "{". Returns index of the matching closing token or the last index, if it is missing.
+        """
+
+        texts = tokens.texts
+        opening_text = texts[index]
+        closing_text = CLOSING_TEXT_BY_OPENING_TEXT[opening_text]
+        depth = 0
+
+        for index in range(index, len(texts)):
+            text = texts[index]
+
+            if text == opening_text:
+                depth += 1
+            elif text == closing_text:
+                depth -= 1
+
+                if depth == 0:
+                    return index
+
+        return len(texts) - 1
+
+    def find_statement_end(self, tokens:ActionScriptTokens, index:int) -> int:
+        """
+        Returns index of the ";" that ends the statement (or the token before "}" that closes the scope), skipping everything inside brackets.
+        """
+
+        texts = tokens.texts
+
+        while index < len(texts):
+            text = texts[index]
+
+            if text == ";":
+                return index
+
+            if text == CLOSING_CURLY_BRACE:
+                return index - 1
+
+            if text in CLOSING_TEXT_BY_OPENING_TEXT:
+                index = self.find_matching_closing_token(tokens, index)
+
+            index += 1
+
+        return len(texts) - 1
+
+    def get_token_text(self, tokens:ActionScriptTokens, index:int) -> str:
+        if index < len(tokens.texts):
+            return tokens.texts[index]
+        return ""
+
+    def parse_package(self, tokens:ActionScriptTokens, index:int) -> int:
+        self.package_name, index = self.parse_qualified_name(tokens, index + 1)
+        return index - 1
+
+    def parse_import(self, tokens:ActionScriptTokens, index:int) -> int:
+        import_string, index = self.parse_qualified_name(tokens, index + 1)
+
+        self.add_import_data(ActionScriptImportDatas(
+            import_string = import_string
+        ))
+
+        return index - 1
+
+    def add_import_data(self, import_data:ActionScriptImportDatas) -> None:
         self.import_datas.append(import_data)
         self.import_datas_by_import_string[import_data.import_string] = import_data
 
-    def parse_class_definition(self, line_splitted_by_space:List[str], word_index:int) -> None:
-        IMPLEMENTS_TEXT = "implements"
-        EXTENDS_TEXT = "extends"
+        class_name = import_data.import_string.split(".")[-1]
+
+        if class_name in self.import_string_by_class_name:
+            if self.import_string_by_class_name[class_name] != import_data.import_string:
+                self.duplicate_imported_class_names.add(class_name)
+        else:
+            self.import_string_by_class_name[class_name] = import_data.import_string
+
+    def parse_class_definition(self, tokens:ActionScriptTokens, index:int) -> int:
         implements = []
         extends = ""
-        
-        if IMPLEMENTS_TEXT in line_splitted_by_space:
-            implements_index = line_splitted_by_space.index(IMPLEMENTS_TEXT)
-            while True:
-                implements_index += 1
-                implements_name = line_splitted_by_space[implements_index]
-
-                if implements_name[-1] == ",":
-                    implement = implements_name[:-1]
+        modifiers = self.get_modifiers(tokens, index)
+        name = self.get_token_text(tokens, index + 1)
+        index += 2
+
+        while index < len(tokens.texts) and tokens.texts[index] != OPENING_CURLY_BRACE:
+            match tokens.texts[index]:
+                case "extends":
+                    extends, index = self.parse_qualified_name(tokens, index + 1)
+                    self.try_add_import_accesser(extends, "")
+                case "implements" | ",":
+                    implement, index = self.parse_qualified_name(tokens, index + 1)
                     implements.append(implement)
                     self.try_add_import_accesser(implement, "")
-                    continue
-
-                implements.append(implements_name)
-                self.try_add_import_accesser(implements_name, "")
-                break
-
-        if EXTENDS_TEXT in line_splitted_by_space:
-            extends_index = line_splitted_by_space.index(EXTENDS_TEXT)
-            extends = line_splitted_by_space[extends_index + 1]
-            self.try_add_import_accesser(extends, "")
+                case _:
+                    index += 1
 
         class_info = ActionScriptClassData(
-            name=line_splitted_by_space[word_index + 1],
+            name=name,
             implements=implements,
             extends=extends,
-            visibility=line_splitted_by_space[0]
+            visibility=self.parse_visibility(modifiers)
         )
 
         self.class_datas.append(class_info)
 
-    def is_static(self, line_splitted_by_space:List[str]) -> bool:
-        return "static" in line_splitted_by_space
-
-    def parse_visibility(self, line_splitted_by_space:List[str]) -> str:
-        if line_splitted_by_space[0] in ["public", "private", "protected", "internal"]:
-            return line_splitted_by_space[0]
-        return "public"
+        return index - 1
 
-    def parse_var_definition(self, line_splitted_by_space:List[str], word_index:int) -> None:
-        name_and_type = line_splitted_by_space[word_index + 1].split(":")
-        name = name_and_type[0]
-        type = name_and_type[1]
+    def is_static(self, modifiers:List[str]) -> bool:
+        return "static" in modifiers
 
-        if type[-1] == ";":
-            type = type[:-1]
+    def parse_visibility(self, modifiers:List[str]) -> str:
+        for modifier in modifiers:
+            if modifier in ["public", "private", "protected", "internal"]:
+                return modifier
+        return "public"
 
-        static = self.is_static(line_splitted_by_space)        
-        visibility = self.parse_visibility(line_splitted_by_space)        
-        
+    def parse_var_definition(self, tokens:ActionScriptTokens, index:int) -> int:
+        modifiers = self.get_modifiers(tokens, index)
+        name = self.get_token_text(tokens, index + 1)
+        type, index = self.parse_type(tokens, index + 2)
+        statement_end_index = self.find_statement_end(tokens, index)
         value = ""
 
-        if "=" in line_splitted_by_space:
-            value = "".join(line_splitted_by_space[line_splitted_by_space.index("=") + 1:])[:-1]
+        if self.get_token_text(tokens, index) == "=":
+            value = "".join(x for x in tokens.texts[index + 1:statement_end_index] if x != ";")
 
         var_info = ActionScriptVarData(
             name=name,
             type=type,
-            visibility=visibility,
-            static=static,
+            visibility=self.parse_visibility(modifiers),
+            static=self.is_static(modifiers),
             value=value
         )
         self.global_var_datas.append(var_info)
@@ -265,13 +834,19 @@ class ActionScriptFileParser:
 
         self.try_add_import_accesser(type, name)
 
-    def parse_local_var_definition(self, line_splitted_by_space:List[str], word_index:int) -> ActionScriptVarData | None:
-        t = line_splitted_by_space[word_index + 1].split(":")
+        return statement_end_index
+
+    def parse_local_var_definition(self, tokens:ActionScriptTokens, index:int) -> ActionScriptVarData | None:
+        name = self.get_token_text(tokens, index + 1)
+
+        if not is_identifier(name):
+            return None
+
+        type, _ = self.parse_type(tokens, index + 2)
 
-        if len(t) < 2:
+        if type == "":
             return None
 
-        name, type = t
         return ActionScriptVarData(
             name=name,
             type=type,
@@ -280,146 +855,156 @@ class ActionScriptFileParser:
             value="",
         )
 
-    def parse_access(self, line:str, local_vars_by_name:Dict[str, ActionScriptVarData], function_name:str) -> None:
-        for word in line.split(" "):
-            if not "." in word:
-                continue
-
-            current_word = ""
-            accesses = []
+    def parse_access(self, tokens:ActionScriptTokens, index:int, local_vars_by_name:Dict[str, ActionScriptVarData], function_name:str, class_name:str | None) -> None:
+        """
+        Reads access chain like "this.someVar.someFunction" starting from index. class_name is the class that the function is in.
+        """
 
-            for char in word:
-                if not char.isalpha() and char != "_" and char != ".":
-                    if accesses == []:
-                        current_word = ""
-                        continue
+        texts = tokens.texts
+        accesses = [texts[index]]
 
-                    accesses.append(current_word)
-                    break
+        while index + 2 < len(texts) and texts[index + 1] == "." and is_identifier(texts[index + 2]):
+            accesses.append(texts[index + 2])
+            index += 2
 
-                if char == ".":
-                    accesses.append(current_word)
-                    current_word = ""
-                    continue
+        if len(accesses) < 2:
+            return
 
-                current_word += char
+        first_access = accesses[0]
+        is_first_access_in_imported_classes = first_access in self.import_string_by_class_name
 
-            imported_classes = [x.import_string.split(".")[-1] for x in self.import_datas]
-            first_access = accesses[0]
-            is_first_access_in_imported_classes = first_access in imported_classes
+        class_name_and_package = ""
 
-            class_name_and_package = ""
+        if first_access != "this" and not is_first_access_in_imported_classes:
+            if not first_access in local_vars_by_name:
+                return
 
-            if first_access != "this" and not is_first_access_in_imported_classes:
-                if not first_access in local_vars_by_name:
-                    continue
+            var_type = local_vars_by_name[first_access].type
 
-                class_name = local_vars_by_name[first_access].type
+            if not var_type in self.import_string_by_class_name:
+                return
 
-                if not class_name in imported_classes:
-                    continue
+            class_name_and_package = self.import_string_by_class_name[var_type]
 
-                class_name_and_package = self.import_datas[imported_classes.index(class_name)].import_string
+        if is_first_access_in_imported_classes:
+            class_name_and_package = self.import_string_by_class_name[first_access]
 
-            if is_first_access_in_imported_classes:
-                class_name_and_package = self.import_datas[imported_classes.index(first_access)].import_string
+        if first_access == "this":
+            if class_name == None:
+                return
 
-            if first_access == "this":
-                class_name_and_package = self.package_name + "." + self.class_datas[-1].name
+            class_name_and_package = self.package_name + "." + class_name
 
-            if class_name_and_package == "" or len(accesses) < 2:
-                continue
+        access_data = ActionScriptAccessData(
+            accessed_class_name_and_package = class_name_and_package,
+            sub_accesses = accesses[1:],
+            function_name = function_name
+        )
 
-            sub_accesses = accesses[1:]
+        self.access_datas.append(access_data)
 
-            access_data = ActionScriptAccessData(
-                accessed_class_name_and_package = class_name_and_package,
-                sub_accesses = sub_accesses,
-                function_name = function_name
-            )
+    def parse_function_body(self, tokens:ActionScriptTokens, start_index:int, end_index:int, name:str, class_name:str | None) -> None:
+        texts = tokens.texts
+        local_vars_by_name = {}
 
-            self.access_datas.append(access_data)
+        # only local var definitions and the dots of access chains are interesting, so they are searched first
+        for index in [x for x in range(start_index, end_index) if texts[x] == "." or texts[x] == "var"]:
+            if texts[index] == "var":
+                var = self.parse_local_var_definition(tokens, index)
 
-    def parse_function_definition(self, line_splitted_by_space:List[str], word_index:int, file:IO) -> None:
-        local_vars_by_name = {}
+                if not var == None:
+                    local_vars_by_name[var.name] = var
 
-        def parse_line_from_function(line:str) -> None:
-            local_line_splitted_by_space = line.split(" ")
-            for index, word in enumerate(local_line_splitted_by_space):
-                if word == "var":
-                    var = self.parse_local_var_definition(local_line_splitted_by_space, index)
+                    self.try_add_import_accesser(var.name, name)
 
-                    if not var == None:
-                        local_vars_by_name[var.name] = var
+                continue
 
-                        self.try_add_import_accesser(var.name, name)
+            # access chain starts from the identifier before the first dot
+            if index < 1 or (index >= 2 and texts[index - 2] == ".") or not is_identifier(texts[index - 1]):
+                continue
 
-                if "." in word:
-                    self.parse_access(line, local_vars_by_name, name)
+            self.parse_access(tokens, index - 1, local_vars_by_name, name, class_name)
 
-        line = " ".join(line_splitted_by_space)
-        name = line.split(OPENING_BRACE)[0].split(" ")[-1]
-        visibility = self.parse_visibility(line_splitted_by_space)
-        static = self.is_static(line_splitted_by_space)
+    def parse_function_definition(self, tokens:ActionScriptTokens, index:int) -> int:
+        texts = tokens.texts
+        modifiers = self.get_modifiers(tokens, index)
         setter_getter = ""
+        index += 1
 
-        if "get" in line_splitted_by_space:
-            setter_getter = "get"
+        if self.get_token_text(tokens, index) in ("get", "set") and is_identifier(self.get_token_text(tokens, index + 1)):
+            setter_getter = texts[index]
+            index += 1
 
-        if "set" in line_splitted_by_space:
-            setter_getter = "set"
+        name = ""
+
+        if is_identifier(self.get_token_text(tokens, index)):
+            name = texts[index]
+            index += 1
 
         param_names = []
         param_types = []
 
-        params_string = line.split(OPENING_BRACE)[1].split(CLOSING_BRACE)[0]
-        params = params_string.split(",")
+        if self.get_token_text(tokens, index) == OPENING_BRACE:
+            params_end_index = self.find_matching_closing_token(tokens, index)
+            index += 1
 
-        # if there is params, then parse them
-        if not params[0] == "":
-            for param in params:
+            while index < params_end_index:
                 # this is for handling variable-length argument list
-                if "..." in param:
-                    param_names.append(param)
+                if texts[index] == "...":
+                    param_names.append("..." + texts[index + 1] if index + 1 < params_end_index else "...")
                     param_types.append("...")
+                    break
+
+                if not is_identifier(texts[index]):
+                    index += 1
                     continue
 
-                param_type = param.split(":")[1]
+                param_name = texts[index]
+                param_type, index = self.parse_type(tokens, index + 1)
 
-                param_names.append(param.split(":")[0])
+                param_names.append(param_name)
                 param_types.append(param_type)
                 self.try_add_import_accesser(param_type, name)
 
-        return_type = ""
+                # skip the default value
+                while index < params_end_index and texts[index] != ",":
+                    if texts[index] in CLOSING_TEXT_BY_OPENING_TEXT:
+                        index = self.find_matching_closing_token(tokens, index)
+                    index += 1
 
-        # parse return type if the function has one
-        if line_splitted_by_space[-2] == ":":
-            return_type = line_splitted_by_space[-1]
-            self.try_add_import_accesser(return_type, name)
+                index += 1
 
-        OPENING_CURLY_BRACE = "{}"[0] # the "{}"[0] is for my stupid lsp which will freak out if i dont close open parenthesis in string
-        CLOSING_CURLY_BRACE = "{}"[1] # the "{}"[1] is for my stupid lsp which will freak out if i dont close open parenthesis in string
-        function_line_count = 0
-        scope_depth = 0
+            index = params_end_index + 1
 
-        if not line[-1] == ";":
-            for line in file:
-                if OPENING_CURLY_BRACE in line:
-                    scope_depth += 1
-                if CLOSING_CURLY_BRACE in line:
-                    scope_depth -= 1
+        return_type, index = self.parse_type(tokens, index)
 
-                if scope_depth == 0:
-                    break
+        if return_type != "":
+            self.try_add_import_accesser(return_type, name)
 
-                function_line_count += 1
+        function_line_count = 0
+        next_text = self.get_token_text(tokens, index)
+
+        if next_text == OPENING_CURLY_BRACE:
+            body_end_index = self.find_matching_closing_token(tokens, index)
+            class_name = self.class_datas[-1].name if len(self.class_datas) > 0 else None # classes can't be nested, so the function is in the last class so far
+            # lines from the "{" line to the line before "}". With the "{" on its own line (FFDec output) this is the same count that the old line based parser gave,
+            # and a "{" on the signature line gives the same count for the same body, so the brace style doesn't matter.
+            function_line_count = tokens.lines[body_end_index] - tokens.lines[index]
+
+            if self.lazy_function_bodies:
+                body_end = tokens.offsets[body_end_index] + len(texts[body_end_index])
+                self.unparsed_function_bodies.append(ActionScriptFunctionBody(name, class_name, tokens.offsets[index], body_end))
+            else:
+                self.parse_function_body(tokens, index + 1, body_end_index, name, class_name)
 
-                parse_line_from_function(line)
+            index = body_end_index
+        elif next_text != ";":
+            index -= 1
 
         function_data = ActionScriptFunctionData(
             name=name,
-            visibility=visibility,
-            static=static,
+            visibility=self.parse_visibility(modifiers),
+            static=self.is_static(modifiers),
             param_names=param_names,
             param_types=param_types,
             return_type=return_type,
@@ -430,43 +1015,82 @@ class ActionScriptFileParser:
         self.function_datas.append(function_data)
         self.function_datas_by_name[name] = function_data
 
-    def parse_interface_definition(self, line_splitted_by_space:List[str], word_index:int) -> None:
+        return index
+
+    def parse_interface_definition(self, tokens:ActionScriptTokens, index:int) -> int:
         interface_data = ActionScriptInterfaceData(
-            name = line_splitted_by_space[word_index + 1],
-            visibility = self.parse_visibility(line_splitted_by_space)
+            name = self.get_token_text(tokens, index + 1),
+            visibility = self.parse_visibility(self.get_modifiers(tokens, index))
         )
 
         self.interface_datas.append(interface_data)
-        
-    def parse_line(self, line:str, file:IO) -> None:
-        line_without_leading_or_trailing_whitespace = line.strip()
-        line_splitted_by_space = line_without_leading_or_trailing_whitespace.split(" ")
 
-        for index, word in enumerate(line_splitted_by_space):
-            match word:
+        return index + 1
+
+    def parse_tokens(self, tokens:ActionScriptTokens) -> None:
+        texts = tokens.texts
+        parsed_until_index = -1
+
+        for index in [x for x, text in enumerate(texts) if text in ACTION_SCRIPT_KEYWORDS]:
+            # skip the keywords that were already handled, for example the ones inside function bodies
+            if index <= parsed_until_index:
+                continue
+
+            # "something.var" is not a keyword
+            if index > 0 and texts[index - 1] == ".":
+                continue
+
+            match texts[index]:
                 case "package":
-                    self.parse_package(line_splitted_by_space, index)
+                    parsed_until_index = self.parse_package(tokens, index)
                 case "import":
-                    self.parse_import(line_splitted_by_space, index)
+                    parsed_until_index = self.parse_import(tokens, index)
                 case "class":
-                    self.parse_class_definition(line_splitted_by_space, index)
+                    parsed_until_index = self.parse_class_definition(tokens, index)
                 case "var":
-                    self.parse_var_definition(line_splitted_by_space, index)
+                    parsed_until_index = self.parse_var_definition(tokens, index)
                 case "function":
-                    self.parse_function_definition(line_splitted_by_space, index, file)
+                    parsed_until_index = self.parse_function_definition(tokens, index)
                 case "interface":
-                    self.parse_interface_definition(line_splitted_by_space, index)
-                case _:
-                    pass
+                    parsed_until_index = self.parse_interface_definition(tokens, index)
 
-    def parse_file(self, file_path:str) -> None:
+    def parse_file(self, file_path:str, text:str | None = None) -> None:
         self.file_name = os.path.basename(file_path)
 
-        with open(file_path, "r", encoding="utf-8") as file:
-            for line in file:
-                self.parse_line(line, file)
+        if text == None:
+            text = read_action_script_file(file_path)
+
+        if self.lazy_function_bodies:
+            self.text = text
+            self.parse_tokens(tokenize_action_script_with_offsets(text))
+        else:
+            self.parse_tokens(tokenize_action_script(text))
+
+    def parse_function_bodies(self) -> None:
+        """
+        Parses the function bodies that were skipped in lazy mode. After this the parser is same as if the bodies were parsed right away,
+        except that the accessers from the bodies are after the accessers from the signatures.
+        """
+
+        for function_body in self.unparsed_function_bodies:
+            # the body is tokenized from the "{" to the closing "}", so the tokens are the same as when the whole file is tokenized
+            tokens = tokenize_action_script(self.text[function_body.start:function_body.end])
+            self.parse_function_body(tokens, 1, len(tokens.texts) - 1, function_body.function_name, function_body.class_name)
+
+        self.unparsed_function_bodies = []
+        self.text = None
+
+    def get_resolved_accesses(self, project:ProjectSources) -> Dict["ActionScriptFileParser", List[Tuple[ActionScriptVarData | ActionScriptFunctionData, Accesser]]]:
+        """
+        Returns the vars and functions that the access datas access with their accessers, by the file of the var or function.
+        Made only once, so the function bodies have to be parsed before this. The access datas are not needed after this, so they are removed.
+        """
+
+        if self.resolved_accesses != None:
+            return self.resolved_accesses
+
+        self.resolved_accesses = {}
 
-    def sort_accesses(self, project:ProjectSources) -> None:
         for access in self.access_datas:
             if not access.accessed_class_name_and_package in project.actionscript_file_parsers_by_class_name_and_package:
                 continue
@@ -482,23 +1106,16 @@ class ActionScriptFileParser:
                 if access_name in accessed_AS_parser.function_datas_by_name:
                     access_target = accessed_AS_parser.function_datas_by_name[access_name]
 
-                accesser = Accesser(
-                    file_name = self.file_name,
-                    package_name = self.package_name,
-                    name = access.function_name
-                )
-
                 if access_target:
-                    access_target.accessers.append(accesser)
+                    accesser = SYMBOL_TABLE.get_accesser(self.package_name, self.file_name, access.function_name)
+                    self.resolved_accesses.setdefault(accessed_AS_parser, []).append((access_target, accesser))
 
                 if isinstance(access_target, ActionScriptVarData) and index < len(access.sub_accesses) - 1:
-                    imported_classes = [x.import_string.split(".")[-1] for x in self.import_datas]
+                    import_string = self.get_import_string(access_target.type)
 
-                    if not access_target.type in imported_classes:
+                    if import_string == None:
                         continue
 
-                    import_string = self.import_datas[imported_classes.index(access_target.type)].import_string
-
                     if not import_string in project.actionscript_file_parsers_by_class_name_and_package:
                         continue
 
@@ -506,17 +1123,408 @@ class ActionScriptFileParser:
 
         self.access_datas = []
 
+        return self.resolved_accesses
 
-class DeobfuscationUtils:
-    @staticmethod
-    def is_AS_parser_file_name_and_package_name_obfuscated(target_AS_parser:ActionScriptFileParser, project:ProjectSources) -> bool:
-        if Utils.is_obfuscated(target_AS_parser.package_name) and not project.is_name_already_deobfuscated(target_AS_parser.package_name):
-            return True
+    def sort_accesses(self, project:ProjectSources, accessed_AS_parsers:Set["ActionScriptFileParser"] | None = None) -> None:
+        """
+        Adds the accessers of the access datas to the vars and functions they access. If accessed_AS_parsers is given, only the datas of those files get accessers.
+        """
 
-        if Utils.is_obfuscated(target_AS_parser.file_name) and not project.is_name_already_deobfuscated(target_AS_parser.file_name):
-            return True
+        for accessed_AS_parser, access_targets_and_accessers in self.get_resolved_accesses(project).items():
+            if accessed_AS_parsers != None and not accessed_AS_parser in accessed_AS_parsers:
+                continue
 
-        return False
+            # the accessers of one data are in the same order as the access datas, because every data is in one file
+            for access_target, accesser in access_targets_and_accessers:
+                access_target.accessers.append(accesser)
+
+
+class ParseCache:
+    """
+    On disk cache for ActionScriptFileParser results. Every entry is the pickled data records of a parser (get_data_records) before sort_accesses has been run,
+    so it still contains the raw access datas. The lookup dictionaries are made again when the entry is loaded.
+    Entries are keyed by hash of the file text, file name and PARSER_VERSION. The text is the one that is parsed, so the files are not read twice.
+    """
+
+    ENTRY_FILE_EXTENSION = ".pickle"
+
+    def __init__(self, cache_path:str, size_limit:int) -> None:
+        self.cache_path:str = cache_path
+        self.size_limit:int = size_limit
+        self.hit_count:int = 0
+        self.miss_count:int = 0
+
+        os.makedirs(cache_path, exist_ok=True)
+
+    def get_key(self, file_path:str, text:str, lazy_function_bodies:bool = False) -> str:
+        content_hash = hashlib.sha256()
+        content_hash.update(str(PARSER_VERSION).encode("utf-8") + b"\0")
+        content_hash.update(b"lazy\0" if lazy_function_bodies else b"eager\0")
+        content_hash.update(os.path.basename(file_path).encode("utf-8") + b"\0")
+        content_hash.update(text.encode("utf-8"))
+
+        return content_hash.hexdigest()
+
+    def get_entry_path(self, key:str) -> str:
+        return os.path.join(self.cache_path, key + self.ENTRY_FILE_EXTENSION)
+
+    def load(self, key:str, text:str) -> ActionScriptFileParser | None:
+        """
+        text is the file text that the key was made from. It's not in the entry, but lazy parsers need it for the function bodies.
+        """
+
+        entry_path = self.get_entry_path(key)
+
+        try:
+            with open(entry_path, "rb") as file:
+                as_file_parser = ActionScriptFileParser.from_data_records(pickle.load(file), text)
+
+            # modification time is used as last use time in evict()
+            os.utime(entry_path)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            self.miss_count += 1
+            return None
+
+        self.hit_count += 1
+        return as_file_parser
+
+    def store(self, key:str, as_file_parser:ActionScriptFileParser) -> None:
+        entry_path = self.get_entry_path(key)
+        temp_entry_path = entry_path + ".tmp"
+
+        with open(temp_entry_path, "wb") as file:
+            pickle.dump(as_file_parser.get_data_records(), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_entry_path, entry_path)
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits to size_limit.
+        """
+
+        entries = [x for x in os.scandir(self.cache_path) if x.name.endswith(self.ENTRY_FILE_EXTENSION)]
+        entry_stats = [(x.path, x.stat()) for x in entries]
+        cache_size = sum(stat.st_size for _, stat in entry_stats)
+
+        if cache_size <= self.size_limit:
+            return
+
+        entry_stats.sort(key=lambda x: x[1].st_mtime)
+
+        for entry_path, stat in entry_stats:
+            if cache_size <= self.size_limit:
+                break
+
+            os.remove(entry_path)
+            cache_size -= stat.st_size
+
+    def print_summary(self) -> None:
+        lookup_count = self.hit_count + self.miss_count
+        hit_rate = self.hit_count / lookup_count * 100 if lookup_count > 0 else 0
+        print(f"parse cache: {self.hit_count} hits, {self.miss_count} misses ({hit_rate:.1f}% hit rate)")
+
+
+@dataclass
+class MappingOrigin:
+    pass_name:str
+    round:int
+
+
+class MappingDatabase:
+    """
+    SQLite database for new_name_by_old_name. Every build has its own names, and every name has the pass and round that found it.
+    """
+
+    def __init__(self, database_path:str) -> None:
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS mappings (
+                build TEXT NOT NULL,
+                old_name TEXT NOT NULL,
+                new_name TEXT NOT NULL,
+                pass_name TEXT NOT NULL,
+                round INTEGER NOT NULL,
+                PRIMARY KEY (build, old_name)
+            )
+        """)
+        self.connection.commit()
+
+    def load(self, build:str) -> Tuple[Dict[str, str], Dict[str, MappingOrigin]]:
+        new_name_by_old_name = {}
+        origin_by_old_name = {}
+
+        for old_name, new_name, pass_name, round in self.connection.execute("SELECT old_name, new_name, pass_name, round FROM mappings WHERE build = ?", (build,)):
+            new_name_by_old_name[old_name] = new_name
+            origin_by_old_name[old_name] = MappingOrigin(pass_name, round)
+
+        return new_name_by_old_name, origin_by_old_name
+
+    def store(self, build:str, new_name_by_old_name:Dict[str, str], origin_by_old_name:Dict[str, MappingOrigin]) -> None:
+        """
+        Replaces all the names of the build.
+        """
+
+        rows = []
+
+        for old_name, new_name in new_name_by_old_name.items():
+            origin = origin_by_old_name.get(old_name, MappingOrigin("unknown", 0))
+            rows.append((build, old_name, new_name, origin.pass_name, origin.round))
+
+        with self.connection:
+            self.connection.execute("DELETE FROM mappings WHERE build = ?", (build,))
+            self.connection.executemany("INSERT INTO mappings (build, old_name, new_name, pass_name, round) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class ProjectSnapshot:
+    """
+    Saves a parsed project as numpy arrays, one .npy file per table, so other tools can open them with numpy.load(path, mmap_mode="r") without running the parser.
+    Every string column is an index to the string table: "strings.npy" has the utf-8 bytes of all the strings and "string_offsets.npy" has the start of every string and the end of the last one.
+    Lists are ranges of "string_lists.npy" (implements, param names and param types) or "accesser_indexes.npy" (accessers of an import, var or function), given with start and count columns.
+    The records of a file are ranges of the record tables in the same way, in the same order as in the parser.
+    """
+
+    FORMAT_VERSION = 1 # NOTE: increase this when the tables change
+    TABLE_DTYPES = {
+        "files": [("package_name", "u4"), ("file_name", "u4"), ("import_start", "u4"), ("import_count", "u4"), ("class_start", "u4"), ("class_count", "u4"), ("interface_start", "u4"), ("interface_count", "u4"), ("var_start", "u4"), ("var_count", "u4"), ("function_start", "u4"), ("function_count", "u4")],
+        "imports": [("import_string", "u4"), ("accesser_start", "u4"), ("accesser_count", "u4")],
+        "classes": [("name", "u4"), ("extends", "u4"), ("visibility", "u4"), ("implements_start", "u4"), ("implements_count", "u4")],
+        "interfaces": [("name", "u4"), ("visibility", "u4")],
+        "vars": [("name", "u4"), ("visibility", "u4"), ("type", "u4"), ("static", "u1"), ("value", "u4"), ("accesser_start", "u4"), ("accesser_count", "u4")],
+        "functions": [("name", "u4"), ("visibility", "u4"), ("static", "u1"), ("return_type", "u4"), ("param_start", "u4"), ("param_count", "u4"), ("line_count", "i4"), ("setter_getter", "u4"), ("accesser_start", "u4"), ("accesser_count", "u4")],
+        "accessers": [("package_name", "u4"), ("file_name", "u4"), ("name", "u4")],
+        "mappings": [("old_name", "u4"), ("new_name", "u4")],
+    }
+
+    def __init__(self, snapshot_path:str) -> None:
+        self.snapshot_path:str = snapshot_path
+
+    def get_table_path(self, table_name:str) -> str:
+        return os.path.join(self.snapshot_path, table_name + ".npy")
+
+    def export_project(self, project:ProjectSources) -> None:
+        """
+        Param names and types of a function are one range: the names first and then the types.
+        """
+
+        project.prepare_accessers()
+
+        string_index_by_string:Dict[str, int] = {}
+        accesser_index_by_accesser:Dict[Accesser, int] = {}
+        rows_by_table_name:Dict[str, List[Tuple]] = {x:[] for x in self.TABLE_DTYPES}
+        string_lists:List[int] = []
+        accesser_indexes:List[int] = []
+
+        def get_string_index(text:str) -> int:
+            return string_index_by_string.setdefault(text, len(string_index_by_string))
+
+        def add_string_list(texts:List[str]) -> int:
+            start = len(string_lists)
+            string_lists.extend(get_string_index(x) for x in texts)
+            return start
+
+        def add_accessers(accessers) -> int:
+            start = len(accesser_indexes)
+
+            for accesser in accessers:
+                if not accesser in accesser_index_by_accesser:
+                    accesser_index_by_accesser[accesser] = len(accesser_index_by_accesser)
+                    rows_by_table_name["accessers"].append((get_string_index(accesser.package_name), get_string_index(accesser.file_name), get_string_index(accesser.name)))
+
+                accesser_indexes.append(accesser_index_by_accesser[accesser])
+
+            return start
+
+        for AS_parser in project.actionscript_file_parsers:
+            rows_by_table_name["files"].append((
+                get_string_index(AS_parser.package_name), get_string_index(AS_parser.file_name),
+                len(rows_by_table_name["imports"]), len(AS_parser.import_datas),
+                len(rows_by_table_name["classes"]), len(AS_parser.class_datas),
+                len(rows_by_table_name["interfaces"]), len(AS_parser.interface_datas),
+                len(rows_by_table_name["vars"]), len(AS_parser.global_var_datas),
+                len(rows_by_table_name["functions"]), len(AS_parser.function_datas),
+            ))
+
+            for import_data in AS_parser.import_datas:
+                rows_by_table_name["imports"].append((get_string_index(import_data.import_string), add_accessers(import_data.accessers), len(import_data.accessers)))
+
+            for class_data in AS_parser.class_datas:
+                rows_by_table_name["classes"].append((get_string_index(class_data.name), get_string_index(class_data.extends), get_string_index(class_data.visibility), add_string_list(class_data.implements), len(class_data.implements)))
+
+            for interface_data in AS_parser.interface_datas:
+                rows_by_table_name["interfaces"].append((get_string_index(interface_data.name), get_string_index(interface_data.visibility)))
+
+            for var_data in AS_parser.global_var_datas:
+                rows_by_table_name["vars"].append((get_string_index(var_data.name), get_string_index(var_data.visibility), get_string_index(var_data.type), var_data.static, get_string_index(var_data.value), add_accessers(var_data.accessers), len(var_data.accessers)))
+
+            for function_data in AS_parser.function_datas:
+                rows_by_table_name["functions"].append((
+                    get_string_index(function_data.name), get_string_index(function_data.visibility), function_data.static, get_string_index(function_data.return_type),
+                    add_string_list(function_data.param_names + function_data.param_types), len(function_data.param_names), function_data.line_count,
+                    get_string_index(function_data.setter_getter), add_accessers(function_data.accessers), len(function_data.accessers)
+                ))
+
+        for old_name, new_name in project.new_name_by_old_name.items():
+            rows_by_table_name["mappings"].append((get_string_index(old_name), get_string_index(new_name)))
+
+        encoded_strings = [x.encode("utf-8") for x in string_index_by_string]
+        string_offsets = numpy.concatenate(([0], numpy.cumsum([len(x) for x in encoded_strings]))).astype("u8")
+
+        os.makedirs(self.snapshot_path, exist_ok=True)
+        numpy.save(self.get_table_path("version"), numpy.array([self.FORMAT_VERSION], dtype="u4"))
+        numpy.save(self.get_table_path("strings"), numpy.frombuffer(b"".join(encoded_strings), dtype="u1"))
+        numpy.save(self.get_table_path("string_offsets"), string_offsets)
+        numpy.save(self.get_table_path("string_lists"), numpy.array(string_lists, dtype="u4"))
+        numpy.save(self.get_table_path("accesser_indexes"), numpy.array(accesser_indexes, dtype="u4"))
+
+        for table_name, dtype in self.TABLE_DTYPES.items():
+            numpy.save(self.get_table_path(table_name), numpy.array(rows_by_table_name[table_name], dtype=dtype))
+
+    def load_tables(self) -> Dict | None:
+        """
+        Returns the memory mapped tables by name, or None if there is no snapshot of this version.
+        """
+
+        if not os.path.exists(self.get_table_path("version")):
+            return None
+
+        if numpy.load(self.get_table_path("version"))[0] != self.FORMAT_VERSION:
+            print(f"WARNING: project snapshot {self.snapshot_path} has a different format version, it's not used")
+            return None
+
+        table_names = list(self.TABLE_DTYPES) + ["strings", "string_offsets", "string_lists", "accesser_indexes"]
+
+        return {x:numpy.load(self.get_table_path(x), mmap_mode="r") for x in table_names}
+
+    def import_project(self) -> ProjectSources | None:
+        """
+        Makes the project from the tables without parsing anything. The accesses are already sorted, like in the exported project.
+        """
+
+        tables = self.load_tables()
+
+        if tables == None:
+            return None
+
+        string_bytes = tables["strings"].tobytes()
+        string_offsets = tables["string_offsets"].tolist()
+        strings = [sys.intern(string_bytes[start:end].decode("utf-8")) for start, end in zip(string_offsets, string_offsets[1:])]
+        string_lists = [strings[x] for x in tables["string_lists"].tolist()]
+        accessers = [SYMBOL_TABLE.get_accesser(strings[package_name], strings[file_name], strings[name]) for package_name, file_name, name in tables["accessers"].tolist()]
+        accesser_indexes = tables["accesser_indexes"].tolist()
+
+        def get_accessers(start:int, count:int) -> Tuple[Accesser, ...]:
+            return tuple(accessers[x] for x in accesser_indexes[start:start + count])
+
+        import_rows = tables["imports"].tolist()
+        class_rows = tables["classes"].tolist()
+        interface_rows = tables["interfaces"].tolist()
+        var_rows = tables["vars"].tolist()
+        function_rows = tables["functions"].tolist()
+        project = ProjectSources()
+
+        for package_name, file_name, import_start, import_count, class_start, class_count, interface_start, interface_count, var_start, var_count, function_start, function_count in tables["files"].tolist():
+            AS_parser = ActionScriptFileParser(None)
+            AS_parser.package_name = strings[package_name]
+            AS_parser.file_name = strings[file_name]
+
+            for import_string, accesser_start, accesser_count in import_rows[import_start:import_start + import_count]:
+                AS_parser.add_import_data(ActionScriptImportDatas(
+                    import_string = strings[import_string],
+                    accessers = get_accessers(accesser_start, accesser_count)
+                ))
+
+            for name, extends, visibility, implements_start, implements_count in class_rows[class_start:class_start + class_count]:
+                AS_parser.class_datas.append(ActionScriptClassData(
+                    name = strings[name],
+                    implements = string_lists[implements_start:implements_start + implements_count],
+                    extends = strings[extends],
+                    visibility = strings[visibility]
+                ))
+
+            for name, visibility in interface_rows[interface_start:interface_start + interface_count]:
+                AS_parser.interface_datas.append(ActionScriptInterfaceData(
+                    name = strings[name],
+                    visibility = strings[visibility]
+                ))
+
+            for name, visibility, type, static, value, accesser_start, accesser_count in var_rows[var_start:var_start + var_count]:
+                var_data = ActionScriptVarData(
+                    name = strings[name],
+                    visibility = strings[visibility],
+                    type = strings[type],
+                    static = bool(static),
+                    value = strings[value],
+                    accessers = get_accessers(accesser_start, accesser_count)
+                )
+
+                AS_parser.global_var_datas.append(var_data)
+                AS_parser.global_var_datas_by_name[var_data.name] = var_data
+
+            for name, visibility, static, return_type, param_start, param_count, line_count, setter_getter, accesser_start, accesser_count in function_rows[function_start:function_start + function_count]:
+                function_data = ActionScriptFunctionData(
+                    name = strings[name],
+                    visibility = strings[visibility],
+                    static = bool(static),
+                    return_type = strings[return_type],
+                    param_names = string_lists[param_start:param_start + param_count],
+                    param_types = string_lists[param_start + param_count:param_start + param_count * 2],
+                    line_count = line_count,
+                    setter_getter = strings[setter_getter],
+                    accessers = get_accessers(accesser_start, accesser_count)
+                )
+
+                AS_parser.function_datas.append(function_data)
+                AS_parser.function_datas_by_name[function_data.name] = function_data
+
+            project.add_actionscript_file_parser(AS_parser)
+
+        for old_name, new_name in tables["mappings"].tolist():
+            project.new_name_by_old_name[strings[old_name]] = strings[new_name]
+
+        project.accesses_sorted = True
+
+        return project
+
+
+class DeobfuscationUtils:
+    @staticmethod
+    def get_target_AS_parsers(target_AS_parsers:List[ActionScriptFileParser] | None, project:ProjectSources) -> List[ActionScriptFileParser]:
+        """
+        Passes will go through all the files of the project, if target_AS_parsers is None.
+        """
+
+        if target_AS_parsers == None:
+            return project.actionscript_file_parsers
+
+        return target_AS_parsers
+
+    @staticmethod
+    def is_AS_parser_file_name_and_package_name_obfuscated(target_AS_parser:ActionScriptFileParser, project:ProjectSources) -> bool:
+        if Utils.is_obfuscated(target_AS_parser.package_name) and not project.is_name_already_deobfuscated(target_AS_parser.package_name):
+            return True
+
+        if Utils.is_obfuscated(target_AS_parser.file_name) and not project.is_name_already_deobfuscated(target_AS_parser.file_name):
+            return True
+
+        return False
+
+    @staticmethod
+    def AS_parsers_are_matching(target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser, project:ProjectSources) -> None:
+        """
+        Maps the package, file, class and interface names of target_AS_parser to the ones of reference_AS_parser. Classes and interfaces are matched by index.
+        """
+
+        for index, target_class_info in enumerate(target_AS_parser.class_datas):
+            project.new_name_by_old_name[target_class_info.name] = reference_AS_parser.class_datas[index].name
+
+        for index, target_interface_data in enumerate(target_AS_parser.interface_datas):
+            project.new_name_by_old_name[target_interface_data.name] = reference_AS_parser.interface_datas[index].name
+
+        project.new_name_by_old_name[target_AS_parser.package_name] = reference_AS_parser.package_name
+        project.new_name_by_old_name[target_AS_parser.file_name] = reference_AS_parser.file_name
 
 
 class BasicClassAndPackageNameDeobfuscationPass:
@@ -528,20 +1536,44 @@ class BasicClassAndPackageNameDeobfuscationPass:
         self.reference_project:ProjectSources = reference_project
         self.target_project:ProjectSources = target_project
 
-        self.reference_project_action_script_files_by_import_count:Dict[int, List[ActionScriptFileParser]] = self.sort_action_script_file_parsers_by_import_count(reference_project)
-        self.target_project_action_script_files_by_import_count:Dict[int, List[ActionScriptFileParser]] = self.sort_action_script_file_parsers_by_import_count(target_project)
+        self.reference_AS_parsers_by_signature_hash:Dict[Tuple, List[ActionScriptFileParser]] = {}
+        self.reference_AS_parsers_by_signature_hash_and_package_name:Dict[Tuple, List[ActionScriptFileParser]] = {}
+        self.target_signature_hash_by_AS_parser:Dict[ActionScriptFileParser, Tuple] = {}
+
+        for reference_AS_parser in reference_project.actionscript_file_parsers:
+            signature_hash = self.get_signature_hash(reference_AS_parser)
+            self.reference_AS_parsers_by_signature_hash.setdefault(signature_hash, []).append(reference_AS_parser)
+            self.reference_AS_parsers_by_signature_hash_and_package_name.setdefault((signature_hash, reference_AS_parser.package_name), []).append(reference_AS_parser)
+
+        for target_AS_parser in target_project.actionscript_file_parsers:
+            self.target_signature_hash_by_AS_parser[target_AS_parser] = self.get_signature_hash(target_AS_parser)
 
-    def sort_action_script_file_parsers_by_import_count(self, project:ProjectSources) -> Dict[int, List[ActionScriptFileParser]]:
-        out = {}
-        for action_script_file_parser in project.actionscript_file_parsers:
-            import_count = len(action_script_file_parser.import_datas)
+    def get_signature_hash(self, AS_parser:ActionScriptFileParser) -> Tuple:
+        """
+        Signature hash contains only things that obfuscation doesn't change and that must be equal in matching files (see the checks in deobfuscate).
+        Var and function signatures are not in the hash, because are_vars_matching and are_functions_matching don't require one to one matches.
+        """
+
+        class_signatures = tuple((x.visibility, len(x.implements)) for x in AS_parser.class_datas)
+        interface_signatures = tuple(x.visibility for x in AS_parser.interface_datas)
+
+        return (
+            len(AS_parser.import_datas),
+            len(AS_parser.global_var_datas),
+            len(AS_parser.function_datas),
+            class_signatures,
+            interface_signatures,
+        )
 
-            if not import_count in out:
-                out[import_count] = []
+    def get_reference_AS_parser_candidates(self, target_AS_parser:ActionScriptFileParser) -> List[ActionScriptFileParser]:
+        signature_hash = self.target_signature_hash_by_AS_parser[target_AS_parser]
+        target_package_name = self.target_project.try_get_new_name(target_AS_parser.package_name)
 
-            out[import_count].append(action_script_file_parser)
+        # if the package name is known, then only the files from the same package can match
+        if not Utils.is_obfuscated(target_package_name):
+            return self.reference_AS_parsers_by_signature_hash_and_package_name.get((signature_hash, target_package_name), [])
 
-        return out
+        return self.reference_AS_parsers_by_signature_hash.get(signature_hash, [])
 
     def is_already_deobfuscated(self, target_AS_parser:ActionScriptFileParser) -> bool:
         if not self.target_project.is_name_already_deobfuscated(target_AS_parser.package_name) and Utils.is_obfuscated(target_AS_parser.package_name):
@@ -718,35 +1750,16 @@ class BasicClassAndPackageNameDeobfuscationPass:
 
         return target_package_name == reference_AS_parser.package_name
 
-    def AS_parsers_are_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> None:
-        for index, target_class_info in enumerate(target_AS_parser.class_datas):
-            self.target_project.new_name_by_old_name[target_class_info.name] = reference_AS_parser.class_datas[index].name
-
-        for index, target_interface_data in enumerate(target_AS_parser.interface_datas):
-            self.target_project.new_name_by_old_name[target_interface_data.name] = reference_AS_parser.interface_datas[index].name
-
-        self.target_project.new_name_by_old_name[target_AS_parser.package_name] = reference_AS_parser.package_name
-        self.target_project.new_name_by_old_name[target_AS_parser.file_name] = reference_AS_parser.file_name
-
-    def deobfuscate(self) -> None:
-        # TODO: narrow down reference files by searching from same package, if package is known
-        for target_AS_parser in self.target_project.actionscript_file_parsers:
-
-            import_count = len(target_AS_parser.import_datas)
-
+    def deobfuscate(self, target_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        for target_AS_parser in DeobfuscationUtils.get_target_AS_parsers(target_AS_parsers, self.target_project):
             if self.is_already_deobfuscated(target_AS_parser):
                 continue
 
-            if not import_count in self.reference_project_action_script_files_by_import_count:
-                continue
-
-            reference_AS_parsers_with_same_import_counts = self.reference_project_action_script_files_by_import_count[import_count]
-
             matching_AS_file_pair:Tuple|None = None
             matching_AS_file_pair_count = 0
 
-            for reference_AS_parser in reference_AS_parsers_with_same_import_counts:
-
+            # the full checks are done only for the files with same signature hash
+            for reference_AS_parser in self.get_reference_AS_parser_candidates(target_AS_parser):
                 if not self.are_package_names_matching(target_AS_parser, reference_AS_parser):
                     continue
 
@@ -779,7 +1792,7 @@ class BasicClassAndPackageNameDeobfuscationPass:
                 matching_AS_file_pair = (target_AS_parser, reference_AS_parser)
 
             if matching_AS_file_pair_count == 1 and matching_AS_file_pair  != None:
-                self.AS_parsers_are_matching(matching_AS_file_pair[0], matching_AS_file_pair[1])
+                DeobfuscationUtils.AS_parsers_are_matching(matching_AS_file_pair[0], matching_AS_file_pair[1], self.target_project)
 
 
 @dataclass
@@ -788,34 +1801,93 @@ class Match:
     matching_reference_names:List[str] = field(default_factory=list)
 
 
+@dataclass
+class FunctionSignatureBucket:
+    """
+    Reference functions that have the same signature, sorted by line count so the line count window can be found with bisect.
+    """
+
+    line_counts:List[int] = field(default_factory=list)
+    function_indexes:List[int] = field(default_factory=list)
+
+    def get_function_indexes(self, line_count:int | None, line_count_tolerance:int) -> List[int]:
+        """
+        If line_count is None, every function in the bucket is returned.
+        """
+
+        if line_count == None:
+            return self.function_indexes
+
+        start = bisect_left(self.line_counts, line_count - line_count_tolerance)
+        end = bisect_right(self.line_counts, line_count + line_count_tolerance)
+
+        return self.function_indexes[start:end]
+
+
 class FunctionNameDeobfuscationPass:
 
-    def __init__(self, reference_project:ProjectSources, target_project:ProjectSources, line_count_deobfudcation_enabled:bool) -> None:
+    def __init__(self, reference_project:ProjectSources, target_project:ProjectSources, line_count_deobfudcation_enabled:bool, line_count_tolerance:int = 0) -> None:
         self.reference_project = reference_project
         self.target_project = target_project
         self.line_count_deobfudcation_enabled:bool = line_count_deobfudcation_enabled
+        self.line_count_tolerance = line_count_tolerance # 0 means that the line counts have to be exactly the same
+        self.reference_function_buckets_by_AS_parser:Dict[ActionScriptFileParser, Dict[Tuple[int, bool, str], Dict[str, FunctionSignatureBucket]]] = {}
 
-    def do_signuture_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> List[Match]:
+    def get_reference_function_buckets(self, reference_AS_parser:ActionScriptFileParser) -> Dict[Tuple[int, bool, str], Dict[str, FunctionSignatureBucket]]:
+        """
+        (param count, static, visibility) -> return type -> bucket.
+        The return type is in its own level, because obfuscated target return types have to be matched against all of them.
+        The reference project never changes, so this is made only once per file.
+        """
 
-        def are_params_matching(target_param_names:List[str], target_param_types:List[str], reference_param_names:List[str], reference_param_types:List[str]) -> bool:
-            if len(target_param_names) != len(reference_param_names):
-                return False
+        if reference_AS_parser in self.reference_function_buckets_by_AS_parser:
+            return self.reference_function_buckets_by_AS_parser[reference_AS_parser]
 
-            for index, target_param_name in enumerate(target_param_names):
-                target_param_name = self.target_project.try_get_new_name(target_param_name)
+        function_indexes_by_signature:Dict[Tuple[int, bool, str, str], List[int]] = {}
 
-                if not Utils.is_obfuscated(target_param_name):
-                    if not target_param_name == reference_param_names[index]:
-                        return False
+        for index, reference_function_data in enumerate(reference_AS_parser.function_datas):
+            signature = (len(reference_function_data.param_names), reference_function_data.static, reference_function_data.visibility, reference_function_data.return_type)
+            function_indexes_by_signature.setdefault(signature, []).append(index)
 
-                target_param_type = self.target_project.try_get_new_name(target_param_types[index])
+        reference_function_buckets:Dict[Tuple[int, bool, str], Dict[str, FunctionSignatureBucket]] = {}
 
-                if not Utils.is_obfuscated(target_param_type):
-                    if not target_param_type == reference_param_types[index]:
-                        return False
+        for signature, function_indexes in function_indexes_by_signature.items():
+            function_indexes.sort(key = lambda x: reference_AS_parser.function_datas[x].line_count) # sort is stable, so the file order is kept inside the same line count
 
-            return True
+            bucket = FunctionSignatureBucket(
+                line_counts = [reference_AS_parser.function_datas[x].line_count for x in function_indexes],
+                function_indexes = function_indexes
+            )
+            reference_function_buckets.setdefault(signature[:3], {})[signature[3]] = bucket
+
+        self.reference_function_buckets_by_AS_parser[reference_AS_parser] = reference_function_buckets
+
+        return reference_function_buckets
+
+    def is_reference_function_matching(self, target_name:str, target_param_names:List[str], target_param_types:List[str], reference_function_data:ActionScriptFunctionData) -> bool:
+        """
+        The target name and params have to be already run through try_get_new_name.
+        """
+
+        if not Utils.is_obfuscated(target_name):
+            if not target_name == reference_function_data.name:
+                return False
+
+        for index, target_param_name in enumerate(target_param_names):
+            if not Utils.is_obfuscated(target_param_name):
+                if not target_param_name == reference_function_data.param_names[index]:
+                    return False
+
+            target_param_type = target_param_types[index]
 
+            if not Utils.is_obfuscated(target_param_type):
+                if not target_param_type == reference_function_data.param_types[index]:
+                    return False
+
+        return True
+
+    def do_signuture_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> List[Match]:
+        reference_function_buckets = self.get_reference_function_buckets(reference_AS_parser)
         matches = []
 
         for target_function_data in target_AS_parser.function_datas:
@@ -823,39 +1895,45 @@ class FunctionNameDeobfuscationPass:
                 target_name = target_function_data.name
             )
 
-            for reference_function_data in reference_AS_parser.function_datas:
-                target_return_type = self.target_project.try_get_new_name(target_function_data.return_type)
+            buckets_by_return_type = reference_function_buckets.get((len(target_function_data.param_names), target_function_data.static, target_function_data.visibility))
 
-                if not Utils.is_obfuscated(target_return_type):
-                    if not target_return_type == reference_function_data.return_type:
-                        continue
+            if buckets_by_return_type == None:
+                matches.append(match)
+                continue
 
-                target_name = self.target_project.try_get_new_name(target_function_data.name)
+            target_return_type = self.target_project.try_get_new_name(target_function_data.return_type)
 
-                if not Utils.is_obfuscated(target_name):
-                    if not target_name == reference_function_data.name:
-                        continue
+            if Utils.is_obfuscated(target_return_type):
+                buckets = list(buckets_by_return_type.values())
+            elif target_return_type in buckets_by_return_type:
+                buckets = [buckets_by_return_type[target_return_type]]
+            else:
+                buckets = []
 
-                if not target_function_data.visibility == reference_function_data.visibility:
-                    continue
+            line_count = target_function_data.line_count if self.line_count_deobfudcation_enabled else None
+            reference_function_indexes = []
 
-                if not target_function_data.static == reference_function_data.static:
-                    continue
+            for bucket in buckets:
+                reference_function_indexes += bucket.get_function_indexes(line_count, self.line_count_tolerance)
 
-                if not are_params_matching(target_function_data.param_names, target_function_data.param_types, reference_function_data.param_names, reference_function_data.param_types):
-                    continue
+            target_name = self.target_project.try_get_new_name(target_function_data.name)
+            target_param_names = self.target_project.get_new_names_with_list_of_old_names(target_function_data.param_names)
+            target_param_types = self.target_project.get_new_names_with_list_of_old_names(target_function_data.param_types)
+
+            for index in sorted(reference_function_indexes): # keep the file order of the old pairwise loop
+                reference_function_data = reference_AS_parser.function_datas[index]
 
-                if self.line_count_deobfudcation_enabled and not target_function_data.line_count == reference_function_data.line_count:
+                if not self.is_reference_function_matching(target_name, target_param_names, target_param_types, reference_function_data):
                     continue
-                
+
                 match.matching_reference_names.append(reference_function_data.name)
 
             matches.append(match)
 
         return matches
 
-    def deobfuscate(self) -> None:
-        for target_AS_parser in self.target_project.actionscript_file_parsers:
+    def deobfuscate(self, target_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        for target_AS_parser in DeobfuscationUtils.get_target_AS_parsers(target_AS_parsers, self.target_project):
             if DeobfuscationUtils.is_AS_parser_file_name_and_package_name_obfuscated(target_AS_parser, self.target_project):
                 continue
 
@@ -895,6 +1973,28 @@ class VariableNameDeobfuscationPass:
     def __init__(self, reference_project:ProjectSources, target_project:ProjectSources) -> None:
         self.reference_project = reference_project
         self.target_project = target_project
+        self.reference_var_indexes_by_accesser_key_by_AS_parser:Dict[ActionScriptFileParser, Dict[Tuple[str, str, str], Set[int]]] = {}
+
+    def is_reference_var_matching(self, target_global_var_data:ActionScriptVarData, reference_global_var_data:ActionScriptVarData) -> bool:
+        target_type = self.target_project.try_get_new_name(target_global_var_data.type)
+
+        if not Utils.is_obfuscated(target_type):
+            if not target_type == reference_global_var_data.type:
+                return False
+
+        target_name = self.target_project.try_get_new_name(target_global_var_data.name)
+
+        if not Utils.is_obfuscated(target_name):
+            if not target_name == reference_global_var_data.name:
+                return False
+
+        if not target_global_var_data.visibility == reference_global_var_data.visibility:
+            return False
+
+        if not target_global_var_data.static == reference_global_var_data.static:
+            return False
+
+        return True
 
     def do_signuture_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> List[Match]:
         matches = []
@@ -905,22 +2005,7 @@ class VariableNameDeobfuscationPass:
             )
 
             for reference_global_var_data in reference_AS_parser.global_var_datas:
-                target_type = self.target_project.try_get_new_name(target_global_var_data.type)
-
-                if not Utils.is_obfuscated(target_type):
-                    if not target_type == reference_global_var_data.type:
-                        continue
-
-                target_name = self.target_project.try_get_new_name(target_global_var_data.name)
-
-                if not Utils.is_obfuscated(target_name):
-                    if not target_name == reference_global_var_data.name:
-                        continue
-
-                if not target_global_var_data.visibility == reference_global_var_data.visibility:
-                    continue
-
-                if not target_global_var_data.static == reference_global_var_data.static:
+                if not self.is_reference_var_matching(target_global_var_data, reference_global_var_data):
                     continue
 
                 match.matching_reference_names.append(reference_global_var_data.name)
@@ -929,51 +2014,69 @@ class VariableNameDeobfuscationPass:
 
         return matches
 
-    def do_accesser_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser, local_matching:bool) -> List[Match]:
+    def get_reference_var_indexes_by_accesser_key(self, reference_AS_parser:ActionScriptFileParser) -> Dict[Tuple[str, str, str], Set[int]]:
+        """
+        (package name, file name, name) of an accesser -> indexes of the reference global vars that have that accesser.
+        The reference project never changes, so this is made only once per file.
+        """
 
-        def are_vars_matching(target_var_data:ActionScriptVarData, reference_var_data:ActionScriptVarData) -> bool:
-            for target_var_accesser in target_var_data.accessers:
-                if local_matching:
-                    if target_var_accesser.package_name != target_AS_parser.package_name:
-                        continue
+        if reference_AS_parser in self.reference_var_indexes_by_accesser_key_by_AS_parser:
+            return self.reference_var_indexes_by_accesser_key_by_AS_parser[reference_AS_parser]
 
-                    if target_var_accesser.file_name != target_AS_parser.file_name:
-                        continue
+        reference_var_indexes_by_accesser_key:Dict[Tuple[str, str, str], Set[int]] = {}
 
-                target_var_accesser_package_name = self.target_project.try_get_new_name(target_var_accesser.package_name)
+        for index, reference_var_data in enumerate(reference_AS_parser.global_var_datas):
+            for reference_var_accesser in reference_var_data.accessers:
+                accesser_key = (reference_var_accesser.package_name, reference_var_accesser.file_name, reference_var_accesser.name)
+                reference_var_indexes_by_accesser_key.setdefault(accesser_key, set()).add(index)
 
-                if Utils.is_obfuscated(target_var_accesser_package_name):
-                    continue
+        self.reference_var_indexes_by_accesser_key_by_AS_parser[reference_AS_parser] = reference_var_indexes_by_accesser_key
 
-                target_var_accesser_file_name = self.target_project.try_get_new_name(target_var_accesser.file_name)
+        return reference_var_indexes_by_accesser_key
 
-                if Utils.is_obfuscated(target_var_accesser_file_name):
-                    continue
+    def get_target_accesser_keys(self, target_AS_parser:ActionScriptFileParser, target_var_data:ActionScriptVarData, local_matching:bool) -> Set[Tuple[str, str, str]]:
+        """
+        Returns the deobfuscated (package name, file name, name) of every accesser that is fully deobfuscated. The others can't be matched so they are skipped.
+        """
 
-                target_var_accesser_name = self.target_project.try_get_new_name(target_var_accesser.name)
+        accesser_keys = set()
 
-                if Utils.is_obfuscated(target_var_accesser_name):
+        for target_var_accesser in target_var_data.accessers:
+            if local_matching:
+                if target_var_accesser.package_name != target_AS_parser.package_name:
                     continue
 
-                matching_reference_accesser_found = False
+                if target_var_accesser.file_name != target_AS_parser.file_name:
+                    continue
 
-                for reference_var_accesser in reference_var_data.accessers:
-                    if target_var_accesser_package_name != reference_var_accesser.package_name:
-                        continue
+            target_var_accesser_package_name = self.target_project.try_get_new_name(target_var_accesser.package_name)
 
-                    if target_var_accesser_file_name != reference_var_accesser.file_name:
-                        continue
+            if Utils.is_obfuscated(target_var_accesser_package_name):
+                continue
 
-                    if target_var_accesser_name != reference_var_accesser.name:
-                        continue
+            target_var_accesser_file_name = self.target_project.try_get_new_name(target_var_accesser.file_name)
 
-                    matching_reference_accesser_found = True
+            if Utils.is_obfuscated(target_var_accesser_file_name):
+                continue
 
-                if not matching_reference_accesser_found:
-                    return False
+            target_var_accesser_name = self.target_project.try_get_new_name(target_var_accesser.name)
 
-            return True
+            if Utils.is_obfuscated(target_var_accesser_name):
+                continue
+
+            accesser_keys.add((target_var_accesser_package_name, target_var_accesser_file_name, target_var_accesser_name))
+
+        return accesser_keys
+
+    def do_accesser_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser, local_matching:bool) -> List[Match]:
+        """
+        Reference var matches if it has every deobfuscated accesser of the target var.
+        """
+
+        self.reference_project.prepare_accessers_of(reference_AS_parser)
+        self.target_project.prepare_accessers_of(target_AS_parser)
 
+        reference_var_indexes_by_accesser_key = self.get_reference_var_indexes_by_accesser_key(reference_AS_parser)
         matches = []
 
         for target_var_data in target_AS_parser.global_var_datas:
@@ -981,16 +2084,27 @@ class VariableNameDeobfuscationPass:
                 target_name = target_var_data.name
             )
 
-            for reference_var_data in reference_AS_parser.global_var_datas:
-                if are_vars_matching(target_var_data, reference_var_data):
-                    match.matching_reference_names.append(reference_var_data.name)
+            reference_var_indexes = None # None means that every reference var matches
 
-        return matches
-                                                
+            for accesser_key in self.get_target_accesser_keys(target_AS_parser, target_var_data, local_matching):
+                indexes = reference_var_indexes_by_accesser_key.get(accesser_key, set())
+                reference_var_indexes = indexes if reference_var_indexes == None else reference_var_indexes & indexes
 
-    def deobfuscate(self) -> None:
+                if not reference_var_indexes:
+                    break
 
-        for target_AS_parser in self.target_project.actionscript_file_parsers:
+            if reference_var_indexes == None:
+                reference_var_indexes = range(len(reference_AS_parser.global_var_datas))
+
+            for index in sorted(reference_var_indexes):
+                match.matching_reference_names.append(reference_AS_parser.global_var_datas[index].name)
+
+            matches.append(match)
+
+        return matches
+
+    def deobfuscate(self, target_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        for target_AS_parser in DeobfuscationUtils.get_target_AS_parsers(target_AS_parsers, self.target_project):
             if DeobfuscationUtils.is_AS_parser_file_name_and_package_name_obfuscated(target_AS_parser, self.target_project):
                 continue
 
@@ -1007,6 +2121,7 @@ class VariableNameDeobfuscationPass:
             reference_AS_parser = self.reference_project.actionscript_file_parsers_by_class_name_and_package[target_as_class_name_and_package]
 
             match_list = self.do_signuture_matching(target_AS_parser, reference_AS_parser)
+            accesser_matches_by_target_name:Dict[str, Match] | None = None # only made if some var has more than one signature match
 
             for match in match_list:
                 matching_reference_count = len(match.matching_reference_names)
@@ -1015,13 +2130,14 @@ class VariableNameDeobfuscationPass:
                         self.target_project.new_name_by_old_name[match.target_name] = match.matching_reference_names[0]
                     continue
 
-                match_list = self.do_accesser_matching(target_AS_parser, reference_AS_parser, True)
+                if accesser_matches_by_target_name == None:
+                    accesser_matches_by_target_name = {x.target_name:x for x in self.do_accesser_matching(target_AS_parser, reference_AS_parser, True)}
 
-                for match in match_list:
-                    matching_reference_count = len(match.matching_reference_names)
-                    if matching_reference_count < 2 and matching_reference_count > 0:
-                        self.target_project.new_name_by_old_name[match.target_name] = match.matching_reference_names[0]
-                        continue
+                accesser_match = accesser_matches_by_target_name[match.target_name]
+                matching_reference_names = [x for x in accesser_match.matching_reference_names if x in match.matching_reference_names]
+
+                if len(matching_reference_names) == 1:
+                    self.target_project.new_name_by_old_name[match.target_name] = matching_reference_names[0]
 
 class ImportMatchingClassAndPackageNameDeobfuscationPass:
     """
@@ -1034,8 +2150,10 @@ class ImportMatchingClassAndPackageNameDeobfuscationPass:
         self.target_project = target_project
 
     def do_accesser_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> List[Match]:
+        self.reference_project.prepare_accessers_of(reference_AS_parser)
+        self.target_project.prepare_accessers_of(target_AS_parser)
 
-        def are_accesses_matching(target_accessers:List[Accesser], reference_accessers:List[Accesser]) -> bool:
+        def are_accesses_matching(target_accessers:Tuple[Accesser, ...], reference_accessers:Tuple[Accesser, ...]) -> bool:
             for target_accesser in target_accessers:
                 target_var_accesser_package_name = self.target_project.try_get_new_name(target_accesser.package_name)
 
@@ -1086,9 +2204,8 @@ class ImportMatchingClassAndPackageNameDeobfuscationPass:
 
         return matches
 
-    def deobfuscate(self) -> None:
-
-        for target_AS_parser in self.target_project.actionscript_file_parsers:
+    def deobfuscate(self, target_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        for target_AS_parser in DeobfuscationUtils.get_target_AS_parsers(target_AS_parsers, self.target_project):
             if DeobfuscationUtils.is_AS_parser_file_name_and_package_name_obfuscated(target_AS_parser, self.target_project):
                 continue
 
@@ -1133,89 +2250,997 @@ class ImportMatchingClassAndPackageNameDeobfuscationPass:
                     self.target_project.new_name_by_old_name[target_class_data.name] = reference_class_data.name
 
 
-def parse_project_sources(source_path:str) -> ProjectSources:
-    sources = ProjectSources()
+@dataclass
+class FuzzyClassMatch:
+    target_file_name:str
+    reference_class_name_and_package:str
+    similarity:float
+    applied:bool
+
+
+class FuzzyClassAndPackageNameDeobfuscationPass:
+    """
+    This pass will only try to deobfuscate class and package names of the files that BasicClassAndPackageNameDeobfuscationPass can't match, because they were changed a bit.
+    Every file is turned into a set of features that obfuscation doesn't change. Near duplicate reference files are found with MinHash and locality sensitive hashing,
+    so targets are compared only against the reference files that share at least one band.
+    """
+
+    MINHASH_PRIME = (1 << 61) - 1
+
+    def __init__(self, reference_project:ProjectSources, target_project:ProjectSources, min_similarity:float = FUZZY_CLASS_MATCHING_MIN_SIMILARITY, progress_events:"ProgressEventStream | None" = None) -> None:
+        self.reference_project = reference_project
+        self.target_project = target_project
+        self.min_similarity = min_similarity
+        self.progress_events:ProgressEventStream | None = progress_events
+        self.fuzzy_matches:List[FuzzyClassMatch] = []
+        self.feature_hash_by_feature:Dict[str, int] = {}
+
+        random_generator = random.Random(0) # fixed seed, so the results are same on every run
+        self.minhash_permutations = [(random_generator.randrange(1, self.MINHASH_PRIME), random_generator.randrange(0, self.MINHASH_PRIME)) for _ in range(FUZZY_MINHASH_BAND_COUNT * FUZZY_MINHASH_ROWS_PER_BAND)]
+
+        self.reference_features_by_AS_parser:Dict[ActionScriptFileParser, Set[str]] = {}
+        self.reference_AS_parsers_by_band:Dict[Tuple, List[ActionScriptFileParser]] = {}
+
+        for reference_AS_parser in reference_project.actionscript_file_parsers:
+            features = self.get_features(reference_AS_parser, reference_project)
+            self.reference_features_by_AS_parser[reference_AS_parser] = features
+
+            for band in self.get_bands(features):
+                self.reference_AS_parsers_by_band.setdefault(band, []).append(reference_AS_parser)
+
+    def get_resolved_import_string(self, import_string:str, project:ProjectSources) -> str:
+        new_import_string = project.try_get_new_name(import_string)
+
+        if not Utils.is_obfuscated(new_import_string):
+            return new_import_string
+
+        # imports of project files are known when the imported file is deobfuscated
+        if import_string in project.actionscript_file_parsers_by_class_name_and_package:
+            imported_AS_parser = project.actionscript_file_parsers_by_class_name_and_package[import_string]
+
+            return project.try_get_new_name(imported_AS_parser.package_name) + "." + project.try_get_new_name(import_string.split(".")[-1])
+
+        return new_import_string
+
+    def get_features(self, AS_parser:ActionScriptFileParser, project:ProjectSources) -> Set[str]:
+        """
+        Names of the members are not used, because they are usually still obfuscated in the target files that are not matched yet.
+        Features that are in the file more than once get a running number, so the set works like a multiset.
+        """
+
+        def get_type(type_name:str) -> str:
+            type_name = project.try_get_new_name(type_name)
+
+            return "?" if Utils.is_obfuscated(type_name) else type_name
+
+        features = []
+
+        for import_data in AS_parser.import_datas:
+            import_string = self.get_resolved_import_string(import_data.import_string, project)
+
+            if not Utils.is_obfuscated(import_string):
+                features.append("import " + import_string)
+
+        for class_data in AS_parser.class_datas:
+            features.append("class " + class_data.visibility)
+            features.append("extends " + get_type(class_data.extends))
+
+            for implement in class_data.implements:
+                features.append("implements " + get_type(implement))
+
+        for interface_data in AS_parser.interface_datas:
+            features.append("interface " + interface_data.visibility)
+
+        for var_data in AS_parser.global_var_datas:
+            features.append(f"var {var_data.visibility} {var_data.static} {get_type(var_data.type)}")
+
+        for function_data in AS_parser.function_datas:
+            param_types = ",".join(get_type(x) for x in function_data.param_types)
+            line_count_bin = bisect_right(FUZZY_LINE_COUNT_BINS, function_data.line_count)
+            features.append(f"function {function_data.visibility} {function_data.static} {function_data.setter_getter} ({param_types}):{get_type(function_data.return_type)} {line_count_bin}")
+
+        feature_counts:Dict[str, int] = {}
+        feature_set = set()
+
+        for feature in features:
+            feature_counts[feature] = feature_counts.get(feature, 0) + 1
+            feature_set.add(f"{feature} #{feature_counts[feature]}")
+
+        return feature_set
+
+    def get_feature_hash(self, feature:str) -> int:
+        # python's own hash is different on every run, so it can't be used
+        if not feature in self.feature_hash_by_feature:
+            self.feature_hash_by_feature[feature] = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size = 8).digest(), "little")
+
+        return self.feature_hash_by_feature[feature]
+
+    def get_bands(self, features:Set[str]) -> List[Tuple]:
+        if len(features) == 0:
+            return []
+
+        feature_hashes = [self.get_feature_hash(x) for x in features]
+        minhash_signature = [min((a * x + b) % self.MINHASH_PRIME for x in feature_hashes) for a, b in self.minhash_permutations]
+        bands = []
+
+        for band_index in range(FUZZY_MINHASH_BAND_COUNT):
+            start = band_index * FUZZY_MINHASH_ROWS_PER_BAND
+            bands.append((band_index, tuple(minhash_signature[start:start + FUZZY_MINHASH_ROWS_PER_BAND])))
+
+        return bands
+
+    def are_structures_matching(self, target_AS_parser:ActionScriptFileParser, reference_AS_parser:ActionScriptFileParser) -> bool:
+        """
+        Class and interface names are matched by index, so their counts still have to be same.
+        """
+
+        if len(target_AS_parser.class_datas) != len(reference_AS_parser.class_datas):
+            return False
+
+        if len(target_AS_parser.interface_datas) != len(reference_AS_parser.interface_datas):
+            return False
+
+        target_package_name = self.target_project.try_get_new_name(target_AS_parser.package_name)
+
+        if not Utils.is_obfuscated(target_package_name) and target_package_name != reference_AS_parser.package_name:
+            return False
+
+        return True
+
+    def get_class_name_and_package(self, AS_parser:ActionScriptFileParser, project:ProjectSources) -> str:
+        """
+        Same key as in ProjectSources.actionscript_file_parsers_by_class_name_and_package. Files without a class use their first interface or their file name.
+        """
+
+        if len(AS_parser.class_datas) > 0:
+            class_name = AS_parser.class_datas[0].name
+        elif len(AS_parser.interface_datas) > 0:
+            class_name = AS_parser.interface_datas[0].name
+        else:
+            class_name = os.path.splitext(AS_parser.file_name)[0]
+
+        return project.try_get_new_name(AS_parser.package_name) + "." + project.try_get_new_name(class_name)
+
+    def get_used_reference_class_names_and_packages(self) -> Set[str]:
+        """
+        Reference files that some target file is already matched with.
+        """
+
+        used_class_names_and_packages = set()
+
+        for target_AS_parser in self.target_project.actionscript_file_parsers:
+            class_name_and_package = self.get_class_name_and_package(target_AS_parser, self.target_project)
+
+            if not Utils.is_obfuscated(class_name_and_package):
+                used_class_names_and_packages.add(class_name_and_package)
+
+        return used_class_names_and_packages
+
+    def get_best_reference_AS_parser(self, target_AS_parser:ActionScriptFileParser) -> Tuple[ActionScriptFileParser | None, float, float]:
+        """
+        Returns the most similar reference file, its similarity and the second best similarity.
+        """
+
+        target_features = self.get_features(target_AS_parser, self.target_project)
+        reference_AS_parser_candidates:Dict[ActionScriptFileParser, None] = {} # dictionary keeps the order, so the results are same on every run
+
+        for band in self.get_bands(target_features):
+            for reference_AS_parser in self.reference_AS_parsers_by_band.get(band, []):
+                reference_AS_parser_candidates[reference_AS_parser] = None
+
+        best_reference_AS_parser = None
+        best_similarity = 0.0
+        second_best_similarity = 0.0
+
+        for reference_AS_parser in reference_AS_parser_candidates:
+            if not self.are_structures_matching(target_AS_parser, reference_AS_parser):
+                continue
+
+            reference_features = self.reference_features_by_AS_parser[reference_AS_parser]
+            similarity = len(target_features & reference_features) / len(target_features | reference_features)
+
+            if similarity > best_similarity:
+                second_best_similarity = best_similarity
+                best_similarity = similarity
+                best_reference_AS_parser = reference_AS_parser
+            elif similarity > second_best_similarity:
+                second_best_similarity = similarity
+
+        return best_reference_AS_parser, best_similarity, second_best_similarity
+
+    def match_AS_parser(self, target_AS_parser:ActionScriptFileParser, used_class_names_and_packages:Set[str]) -> FuzzyClassMatch | None:
+        """
+        Applies the best match, if it is good enough. Returns None if no reference file is similar at all.
+        """
+
+        best_reference_AS_parser, best_similarity, second_best_similarity = self.get_best_reference_AS_parser(target_AS_parser)
+
+        if best_reference_AS_parser == None:
+            return None
+
+        reference_class_name_and_package = self.get_class_name_and_package(best_reference_AS_parser, self.reference_project)
+
+        # a tie or an already used reference file is only offered, because it's probably a wrong match
+        applied = best_similarity >= self.min_similarity and best_similarity > second_best_similarity and not reference_class_name_and_package in used_class_names_and_packages
+
+        if applied:
+            DeobfuscationUtils.AS_parsers_are_matching(target_AS_parser, best_reference_AS_parser, self.target_project)
+            used_class_names_and_packages.add(reference_class_name_and_package)
+
+        return FuzzyClassMatch(
+            target_file_name = target_AS_parser.file_name,
+            reference_class_name_and_package = reference_class_name_and_package,
+            similarity = best_similarity,
+            applied = applied
+        )
+
+    def deobfuscate(self, target_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        used_class_names_and_packages = self.get_used_reference_class_names_and_packages()
+        target_AS_parsers = [x for x in DeobfuscationUtils.get_target_AS_parsers(target_AS_parsers, self.target_project) if Utils.is_obfuscated(self.target_project.try_get_new_name(x.file_name))]
+        fuzzy_matches:List[FuzzyClassMatch] = []
+        start_time = time.perf_counter()
+
+        if self.progress_events:
+            self.progress_events.start_stage("fuzzy_class_matching", len(target_AS_parsers))
+
+        for target_AS_parser in target_AS_parsers:
+            fuzzy_match = None
+
+            # checked again, because a match earlier in the loop gives its file name to every file with the same obfuscated file name
+            if Utils.is_obfuscated(self.target_project.try_get_new_name(target_AS_parser.file_name)):
+                fuzzy_match = self.match_AS_parser(target_AS_parser, used_class_names_and_packages)
+
+            if fuzzy_match != None:
+                fuzzy_matches.append(fuzzy_match)
+
+            if self.progress_events:
+                self.progress_events.file_done("file_fuzzy_matched", target_AS_parser.file_name, match=asdict(fuzzy_match) if fuzzy_match != None else None)
+
+        self.fuzzy_matches += fuzzy_matches
+
+        if self.progress_events:
+            self.progress_events.end_stage()
+
+            applied_count = sum(1 for x in fuzzy_matches if x.applied)
+            self.progress_events.emit("pass_finished", deobfuscation_pass=type(self).__name__, file_count=len(target_AS_parsers), applied_count=applied_count, offered_count=len(fuzzy_matches) - applied_count, elapsed=time.perf_counter() - start_time)
+
+    def print_summary(self) -> None:
+        applied_count = sum(1 for x in self.fuzzy_matches if x.applied)
+
+        print(f"fuzzy class matching: {applied_count} applied, {len(self.fuzzy_matches) - applied_count} offered")
+
+        for fuzzy_match in sorted(self.fuzzy_matches, key = lambda x: -x.similarity):
+            if not fuzzy_match.applied:
+                print(f"    {fuzzy_match.target_file_name} -> {fuzzy_match.reference_class_name_and_package}? (similarity {fuzzy_match.similarity:.2f})")
+
+
+class DeobfuscationPassScheduler:
+    """
+    Runs the deobfuscation passes in rounds until a round doesn't add or change any names in target_project.new_name_by_old_name.
+    The first round goes through all the target files. After that, only the files that use some of the renamed names are run again.
+    """
+
+    def __init__(self, target_project:ProjectSources, deobfuscation_passes:List, max_round_count:int = MAX_DEOBFUSCATION_ROUND_COUNT, progress_events:"ProgressEventStream | None" = None) -> None:
+        self.target_project:ProjectSources = target_project
+        self.progress_events:ProgressEventStream | None = progress_events
+        self.deobfuscation_passes:List = deobfuscation_passes
+        self.max_round_count:int = max_round_count
+        self.round_count:int = 0
+        self.file_evaluation_count:int = 0
+        self.target_AS_parsers_by_used_name:Dict[str, List[ActionScriptFileParser]] | None = None # made by get_target_AS_parsers_by_used_name
+        self.AS_parsers_indexed_with_accessers:Set[ActionScriptFileParser] = set()
+        self.origin_by_old_name:Dict[str, MappingOrigin] = {} # which pass and round found the name
+
+    def get_target_AS_parsers_by_used_name(self) -> Dict[str, List[ActionScriptFileParser]]:
+        """
+        The accessers are not prepared for this. In lazy mode a pass reads the accessers of a file only after preparing them,
+        so the names of the accessers are needed only for the files that have them. Their names are added when the files get them.
+        """
+
+        if self.target_AS_parsers_by_used_name == None:
+            self.target_AS_parsers_by_used_name = {}
+
+            for target_AS_parser in self.target_project.actionscript_file_parsers:
+                has_accessers = self.target_project.has_accessers(target_AS_parser)
+
+                for name in self.get_names_used_by_AS_parser(target_AS_parser, has_accessers):
+                    self.target_AS_parsers_by_used_name.setdefault(name, []).append(target_AS_parser)
+
+                if has_accessers:
+                    self.AS_parsers_indexed_with_accessers.add(target_AS_parser)
+
+        if len(self.AS_parsers_indexed_with_accessers) == len(self.target_project.actionscript_file_parsers):
+            return self.target_AS_parsers_by_used_name
+
+        for target_AS_parser in self.target_project.actionscript_file_parsers:
+            if target_AS_parser in self.AS_parsers_indexed_with_accessers or not self.target_project.has_accessers(target_AS_parser):
+                continue
+
+            for name in self.get_names_used_by_AS_parser(target_AS_parser) - self.get_names_used_by_AS_parser(target_AS_parser, False):
+                self.target_AS_parsers_by_used_name.setdefault(name, []).append(target_AS_parser)
+
+            self.AS_parsers_indexed_with_accessers.add(target_AS_parser)
+
+        return self.target_AS_parsers_by_used_name
+
+    def get_names_used_by_AS_parser(self, AS_parser:ActionScriptFileParser, include_accessers:bool = True) -> Set[str]:
+        """
+        Returns every name that the passes look up from new_name_by_old_name when they are handling this file.
+        """
+
+        names = {AS_parser.package_name, AS_parser.file_name}
+        accessers = []
+
+        for import_data in AS_parser.import_datas:
+            names.add(import_data.import_string)
+            accessers += import_data.accessers
+
+        for class_data in AS_parser.class_datas:
+            names.add(class_data.name)
+            names.add(class_data.extends)
+            names.update(class_data.implements)
+
+        for interface_data in AS_parser.interface_datas:
+            names.add(interface_data.name)
+
+        for var_data in AS_parser.global_var_datas:
+            names.add(var_data.name)
+            names.add(var_data.type)
+            accessers += var_data.accessers
+
+        for function_data in AS_parser.function_datas:
+            names.add(function_data.name)
+            names.add(function_data.return_type)
+            names.update(function_data.param_names)
+            names.update(function_data.param_types)
+            accessers += function_data.accessers
+
+        if include_accessers:
+            for accesser in accessers:
+                names.add(accesser.package_name)
+                names.add(accesser.file_name)
+                names.add(accesser.name)
+
+        return names
+
+    def get_declared_names(self, AS_parser:ActionScriptFileParser) -> List[str]:
+        """
+        Names that the passes give new names to when they are handling this file.
+        """
+
+        names = [AS_parser.package_name, AS_parser.file_name]
+        names += [x.name for x in AS_parser.class_datas]
+        names += [x.name for x in AS_parser.interface_datas]
+        names += [x.name for x in AS_parser.global_var_datas]
+        names += [x.name for x in AS_parser.function_datas]
+
+        return names
+
+    def has_unresolved_names(self, AS_parser:ActionScriptFileParser) -> bool:
+        """
+        Imported files are checked too, because ImportMatchingClassAndPackageNameDeobfuscationPass gives names to them.
+        """
+
+        AS_parsers = [AS_parser]
+
+        for import_data in AS_parser.import_datas:
+            if import_data.import_string in self.target_project.actionscript_file_parsers_by_class_name_and_package:
+                AS_parsers.append(self.target_project.actionscript_file_parsers_by_class_name_and_package[import_data.import_string])
+
+        for AS_parser in AS_parsers:
+            for name in self.get_declared_names(AS_parser):
+                if Utils.is_obfuscated(name) and not self.target_project.is_name_already_deobfuscated(name):
+                    return True
+
+        return False
+
+    def get_AS_parsers_with_unresolved_names(self) -> List[ActionScriptFileParser]:
+        return [x for x in self.target_project.actionscript_file_parsers if self.has_unresolved_names(x)]
+
+    def record_changed_names(self, new_name_by_old_name_before:Dict[str, str], pass_name:str) -> int:
+        """
+        Returns how many names were changed.
+        """
+
+        changed_names = self.get_changed_names(new_name_by_old_name_before)
+
+        for old_name in changed_names:
+            self.origin_by_old_name[old_name] = MappingOrigin(pass_name, self.round_count)
+
+        return len(changed_names)
+
+    def get_changed_names(self, new_name_by_old_name_before_round:Dict[str, str]) -> List[str]:
+        changed_names = []
+
+        for old_name, new_name in self.target_project.new_name_by_old_name.items():
+            if new_name_by_old_name_before_round.get(old_name) != new_name:
+                changed_names.append(old_name)
+
+        return changed_names
+
+    def get_AS_parsers_using_names(self, names:List[str]) -> List[ActionScriptFileParser]:
+        AS_parsers = set()
+        target_AS_parsers_by_used_name = self.get_target_AS_parsers_by_used_name()
+
+        for name in names:
+            AS_parsers.update(target_AS_parsers_by_used_name.get(name, []))
+
+        # keep the same order as in the project, so the passes handle the files always in the same order
+        return [x for x in self.target_project.actionscript_file_parsers if x in AS_parsers]
+
+    def run(self, queued_AS_parsers:List[ActionScriptFileParser] | None = None) -> None:
+        """
+        If queued_AS_parsers is None, the first round goes through all the target files.
+        """
+
+        if queued_AS_parsers == None:
+            queued_AS_parsers = self.target_project.actionscript_file_parsers
+
+        round_count = 0
+
+        while len(queued_AS_parsers) > 0 and round_count < self.max_round_count:
+            round_count += 1
+            self.round_count += 1
+            new_name_by_old_name_before_round = dict(self.target_project.new_name_by_old_name)
+            round_start_time = time.perf_counter()
+
+            for deobfuscation_pass in self.deobfuscation_passes:
+                new_name_by_old_name_before_pass = dict(self.target_project.new_name_by_old_name)
+                pass_start_time = time.perf_counter()
+
+                deobfuscation_pass.deobfuscate(queued_AS_parsers)
+                self.file_evaluation_count += len(queued_AS_parsers)
+                changed_name_count = self.record_changed_names(new_name_by_old_name_before_pass, type(deobfuscation_pass).__name__)
+
+                if self.progress_events:
+                    self.progress_events.emit("pass_finished", round=self.round_count, deobfuscation_pass=type(deobfuscation_pass).__name__, file_count=len(queued_AS_parsers), mappings_added=changed_name_count, elapsed=time.perf_counter() - pass_start_time)
+
+            changed_names = self.get_changed_names(new_name_by_old_name_before_round)
+            file_count = len(queued_AS_parsers)
+            queued_AS_parsers = self.get_AS_parsers_using_names(changed_names)
+
+            if self.progress_events:
+                self.progress_events.emit("round_finished", round=self.round_count, file_count=file_count, mappings_added=len(changed_names), mapping_count=len(self.target_project.new_name_by_old_name), next_round_file_count=len(queued_AS_parsers), elapsed=time.perf_counter() - round_start_time)
+
+    def print_summary(self) -> None:
+        print(f"deobfuscation passes: {self.round_count} rounds, {self.file_evaluation_count} file evaluations")
+
+
+@dataclass
+class ProfilingSection:
+    call_count:int = 0
+    wall_time:float = 0.0 # in seconds
+    candidate_pair_count:int = 0 # target and reference pairs that were compared: file pairs in the class passes, function or var pairs in the name passes
+    predicate_call_counts:Dict[str, int] = field(default_factory=dict)
+    try_get_new_name_call_count:int = 0
+    is_obfuscated_call_count:int = 0
+    new_mapping_count:int = 0 # names that were added or changed in new_name_by_old_name
+    peak_memory_usage:float | None = None # in megabytes, peak of the whole process when the section last ended
+
+
+class Profiler:
+    """
+    install() replaces the profiled functions and methods with wrappers that time and count them, and uninstall() puts the originals back.
+    Counts are added to the section (parsing, a pass or applying the names) that is running when the counted function is called, or to "other".
+    NOTE: the parse workers are separate processes, so the counts from inside them are not included.
+    """
+
+    def __init__(self) -> None:
+        self.sections:Dict[str, ProfilingSection] = {"other":ProfilingSection()}
+        self.section_stack:List[ProfilingSection] = [self.sections["other"]]
+        self.original_functions:List[Tuple[object, str, object]] = []
+        self.start_time:float = time.perf_counter()
+
+    def patch(self, owner:object, name:str, make_wrapper:Callable) -> None:
+        original_function = vars(owner)[name]
+        wrapper = make_wrapper(getattr(owner, name))
+
+        if isinstance(original_function, staticmethod):
+            wrapper = staticmethod(wrapper)
+
+        self.original_functions.append((owner, name, original_function))
+        setattr(owner, name, wrapper)
+
+    def wrap_section(self, function:Callable, section_name:str, is_pass:bool = False) -> Callable:
+        @functools.wraps(function)
+        def profiled_function(*args, **kwargs):
+            section = self.sections.setdefault(section_name, ProfilingSection())
+            new_name_by_old_name_before = dict(args[0].target_project.new_name_by_old_name) if is_pass else None
+
+            self.section_stack.append(section)
+            start_time = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                section.wall_time += time.perf_counter() - start_time
+                self.section_stack.pop()
+                section.call_count += 1
+                section.peak_memory_usage = Utils.get_peak_memory_usage()
+
+                if new_name_by_old_name_before != None:
+                    for old_name, new_name in args[0].target_project.new_name_by_old_name.items():
+                        if new_name_by_old_name_before.get(old_name) != new_name:
+                            section.new_mapping_count += 1
+
+        return profiled_function
+
+    def wrap_counter(self, function:Callable, counter_name:str) -> Callable:
+        @functools.wraps(function)
+        def counted_function(*args, **kwargs):
+            section = self.section_stack[-1]
+            setattr(section, counter_name, getattr(section, counter_name) + 1)
+
+            return function(*args, **kwargs)
+
+        return counted_function
+
+    def wrap_predicate(self, function:Callable) -> Callable:
+        @functools.wraps(function)
+        def counted_function(*args, **kwargs):
+            predicate_call_counts = self.section_stack[-1].predicate_call_counts
+            predicate_call_counts[function.__name__] = predicate_call_counts.get(function.__name__, 0) + 1
+
+            return function(*args, **kwargs)
+
+        return counted_function
+
+    def install(self) -> None:
+        module = sys.modules[__name__]
+
+        # NOTE: this makes the run slower, but otherwise the report has no memory usage on windows without psutil
+        if Utils.get_peak_memory_usage() == None:
+            print("WARNING: psutil is not installed, so the peak memory usage is only the python allocations that tracemalloc sees")
+            tracemalloc.start()
+
+        for function_name in ["parse_project_sources", "apply_deobfuscations_to_files"]:
+            self.patch(module, function_name, lambda x, function_name=function_name: self.wrap_section(x, function_name))
+
+        for pass_class in [BasicClassAndPackageNameDeobfuscationPass, FunctionNameDeobfuscationPass, VariableNameDeobfuscationPass, ImportMatchingClassAndPackageNameDeobfuscationPass, FuzzyClassAndPackageNameDeobfuscationPass]:
+            self.patch(pass_class, "deobfuscate", lambda x, pass_class=pass_class: self.wrap_section(x, pass_class.__name__, is_pass=True))
+
+        # every pass calls one of these once for each target and reference pair it compares. The function and variable passes compare only one file pair
+        # for each target file, so their functions and vars are counted instead
+        self.patch(BasicClassAndPackageNameDeobfuscationPass, "are_package_names_matching", lambda x: self.wrap_counter(x, "candidate_pair_count"))
+        self.patch(FunctionNameDeobfuscationPass, "is_reference_function_matching", lambda x: self.wrap_counter(x, "candidate_pair_count"))
+        self.patch(VariableNameDeobfuscationPass, "is_reference_var_matching", lambda x: self.wrap_counter(x, "candidate_pair_count"))
+        self.patch(ImportMatchingClassAndPackageNameDeobfuscationPass, "do_accesser_matching", lambda x: self.wrap_counter(x, "candidate_pair_count"))
+        self.patch(FuzzyClassAndPackageNameDeobfuscationPass, "are_structures_matching", lambda x: self.wrap_counter(x, "candidate_pair_count"))
+
+        for predicate_name in ["are_package_names_matching", "are_class_signutures_matching", "are_interface_signutures_matching", "are_imports_matching", "are_vars_matching", "are_functions_matching"]:
+            self.patch(BasicClassAndPackageNameDeobfuscationPass, predicate_name, self.wrap_predicate)
+
+        self.patch(DeobfuscationUtils, "is_AS_parser_file_name_and_package_name_obfuscated", self.wrap_predicate)
+        self.patch(ProjectSources, "try_get_new_name", lambda x: self.wrap_counter(x, "try_get_new_name_call_count"))
+        self.patch(Utils, "is_obfuscated", lambda x: self.wrap_counter(x, "is_obfuscated_call_count"))
+
+    def uninstall(self) -> None:
+        # in reverse order, because are_package_names_matching is wrapped twice
+        for owner, name, original_function in reversed(self.original_functions):
+            setattr(owner, name, original_function)
+
+        self.original_functions = []
+
+    def write_report(self, report_path:str) -> None:
+        report = {
+            "total_wall_time": time.perf_counter() - self.start_time,
+            "peak_memory_usage": Utils.get_peak_memory_usage(),
+            "sections": {name:asdict(section) for name, section in self.sections.items()},
+        }
+
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+        print(f"profiling report written to {report_path}")
+
+
+class ProgressEventStream:
+    """
+    Writes one JSON object per line. Every event has "event" and "time", which is seconds since the stream was made.
+    A stage (parsing, fuzzy class matching or writing the files) is started with start_stage. After that every file_done writes an event for the file,
+    and a "progress" event with throughput and ETA when PROGRESS_EVENT_INTERVAL has passed or when the last file is done.
+    NOTE: only call this from the main thread.
+    """
+
+    def __init__(self, events_path:str | None, interval:float = PROGRESS_EVENT_INTERVAL) -> None:
+        self.file:IO = open(events_path, "w", encoding="utf-8") if events_path != None else sys.stderr
+        self.interval:float = interval
+        self.start_time:float = time.perf_counter()
+        self.stage:str = ""
+        self.stage_start_time:float = 0.0
+        self.last_progress_time:float = 0.0
+        self.file_count:int = 0
+        self.done_file_count:int = 0
+        self.done_size:int = 0
+
+    def emit(self, event:str, **values) -> None:
+        self.file.write(json.dumps({"event":event, "time":round(time.perf_counter() - self.start_time, 6), **values}) + "\n")
+        self.file.flush()
+
+    def start_stage(self, stage:str, file_count:int, **values) -> None:
+        self.stage = stage
+        self.stage_start_time = time.perf_counter()
+        self.last_progress_time = self.stage_start_time
+        self.file_count = file_count
+        self.done_file_count = 0
+        self.done_size = 0
+
+        self.emit("stage_started", stage=stage, file_count=file_count, **values)
+
+    def file_done(self, event:str, file_path:str, size:int = 0, **values) -> None:
+        self.done_file_count += 1
+        self.done_size += size
+
+        self.emit(event, file_path=file_path, size=size, **values)
+
+        now = time.perf_counter()
+
+        if now - self.last_progress_time < self.interval and self.done_file_count < self.file_count:
+            return
+
+        self.last_progress_time = now
+        elapsed = now - self.stage_start_time
+        files_per_second = self.done_file_count / max(elapsed, 1e-9)
+
+        self.emit("progress",
+            stage = self.stage,
+            done_file_count = self.done_file_count,
+            file_count = self.file_count,
+            files_per_second = files_per_second,
+            megabytes_per_second = self.done_size / (1024 * 1024) / max(elapsed, 1e-9),
+            eta = (self.file_count - self.done_file_count) / max(files_per_second, 1e-9)
+        )
+
+    def end_stage(self) -> None:
+        self.emit("stage_finished", stage=self.stage, file_count=self.done_file_count, elapsed=time.perf_counter() - self.stage_start_time)
+
+    def close(self) -> None:
+        if self.file != sys.stderr:
+            self.file.close()
+
+
+def get_action_script_file_paths(source_path:str) -> List[str]:
+    file_paths = []
 
     for root, directories, files in os.walk(source_path):
         for filename in files:
             if not filename.split(".")[-1] in ALLOWED_FILE_TYPES:
                 continue
 
-            file_path = os.path.join(root, filename)
-            as_file_parser = ActionScriptFileParser(file_path)
-            sources.actionscript_file_parsers.append(as_file_parser)
+            file_paths.append(os.path.join(root, filename))
 
-            for class_data in as_file_parser.class_datas:
-                sources.actionscript_file_parsers_by_class_name_and_package[as_file_parser.package_name + "." + class_data.name] = as_file_parser
+    return file_paths
 
-    for AS_file_parser in sources.actionscript_file_parsers:
-        AS_file_parser.sort_accesses(sources)
+def parse_project_sources(source_path:str, worker_count:int = PARSE_WORKER_COUNT, parse_cache:ParseCache | None = None, texts_by_file_path:Dict[str, str] | None = None, sort_accesses:bool = True, progress_events:ProgressEventStream | None = None, lazy_function_bodies:bool = LAZY_FUNCTION_BODY_PARSING) -> ProjectSources:
+    """
+    If worker_count is bigger than 1, the files are parsed in worker processes. The parsers are merged in the same order as in serial parsing, so the results are identical.
+    Files found from parse_cache are not parsed at all.
+    If texts_by_file_path is given, its texts are parsed and source_path is not read.
+    If sort_accesses is False, sort_project_accesses has to be called before the project is used.
+    If lazy_function_bodies is True, the accesses are not sorted here. ProjectSources.prepare_accessers does it when the accessers are needed.
+    """
+
+    sources = ProjectSources()
+
+    if texts_by_file_path != None:
+        file_paths = list(texts_by_file_path)
+        texts = list(texts_by_file_path.values())
+    else:
+        file_paths = get_action_script_file_paths(source_path)
+        texts = [None] * len(file_paths)
+
+    as_file_parsers:List[ActionScriptFileParser | None] = [None] * len(file_paths)
+    cache_keys = []
+
+    if parse_cache:
+        # the files are read only once here, so the parsers get the same text that the key was made from
+        texts = [text if text != None else read_action_script_file(file_path) for file_path, text in zip(file_paths, texts)]
+        cache_keys = [parse_cache.get_key(file_path, text, lazy_function_bodies) for file_path, text in zip(file_paths, texts)]
+        as_file_parsers = [parse_cache.load(cache_key, text) for cache_key, text in zip(cache_keys, texts)]
+
+        for as_file_parser in as_file_parsers:
+            if as_file_parser != None:
+                SYMBOL_TABLE.intern_AS_parser(as_file_parser)
+
+    uncached_indexes = [index for index, as_file_parser in enumerate(as_file_parsers) if as_file_parser == None]
+    uncached_file_paths = [file_paths[index] for index in uncached_indexes]
+    uncached_texts = [texts[index] for index in uncached_indexes]
+
+    def get_source_size(index:int) -> int:
+        return len(texts[index]) if texts[index] != None else os.path.getsize(file_paths[index])
+
+    if progress_events:
+        progress_events.start_stage("parse", len(file_paths), source_path=source_path, cached_file_count=len(file_paths) - len(uncached_indexes))
+
+        for index, as_file_parser in enumerate(as_file_parsers):
+            if as_file_parser != None:
+                progress_events.file_done("file_parsed", file_paths[index], get_source_size(index), cached=True)
+
+    def store_parsed_as_file_parsers(parsed_as_file_parsers) -> None:
+        # the parsers are handled as they come, so the progress events are written while parsing
+        for index, as_file_parser in zip(uncached_indexes, parsed_as_file_parsers):
+            as_file_parsers[index] = as_file_parser
+
+            # sort_accesses will modify the parser, so it has to be stored before that
+            if parse_cache:
+                parse_cache.store(cache_keys[index], as_file_parser)
+
+            SYMBOL_TABLE.intern_AS_parser(as_file_parser)
+
+            if progress_events:
+                progress_events.file_done("file_parsed", file_paths[index], get_source_size(index), cached=False)
+
+    if worker_count > 1 and len(uncached_file_paths) > 1:
+        chunk_size = max(1, len(uncached_file_paths) // (worker_count * 4))
+
+        with ProcessPoolExecutor(max_workers=worker_count) as executor:
+            store_parsed_as_file_parsers(executor.map(ActionScriptFileParser, uncached_file_paths, uncached_texts, [lazy_function_bodies] * len(uncached_file_paths), chunksize=chunk_size))
+    else:
+        store_parsed_as_file_parsers(ActionScriptFileParser(file_path, text, lazy_function_bodies) for file_path, text in zip(uncached_file_paths, uncached_texts))
+
+    if parse_cache:
+        parse_cache.evict()
+
+    if progress_events:
+        progress_events.end_stage()
+
+    for as_file_parser in as_file_parsers:
+        sources.add_actionscript_file_parser(as_file_parser)
+
+        if as_file_parser.duplicate_imported_class_names:
+            print(f"WARNING: {as_file_parser.file_name} imports {sorted(as_file_parser.duplicate_imported_class_names)} from more than one package, using the first import")
+
+    if sort_accesses and not lazy_function_bodies:
+        sort_project_accesses(sources)
 
     return sources
 
-def apply_deobfuscations_to_files(source_path:str, new_sources:str, new_name_by_old_name:Dict[str, str]) -> None:
-    def loop_file_content(file_path:str) -> str:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            new_text = ""
+def sort_project_accesses(sources:ProjectSources) -> None:
+    # bodies of every file have to be parsed first, because they add accessers to the other files
+    for AS_file_parser in sources.actionscript_file_parsers:
+        AS_file_parser.parse_function_bodies()
 
-            for line in file:
-                new_line = line
-                inside_obfuscated_name = False
-                obfuscated_name = ""
+    # the files that prepare_accessers_of has handled already have their accessers
+    unsorted_AS_parsers = [x for x in sources.actionscript_file_parsers if not x in sources.AS_parsers_with_accessers]
+    accessed_AS_parsers = set(unsorted_AS_parsers) if sources.AS_parsers_with_accessers else None
 
-                for char in line:
-                    if char == "Å":
-                        inside_obfuscated_name = not inside_obfuscated_name
+    for AS_file_parser in sources.actionscript_file_parsers:
+        AS_file_parser.sort_accesses(sources, accessed_AS_parsers)
+        AS_file_parser.resolved_accesses = None
 
-                        if not inside_obfuscated_name:
-                            obfuscated_name += "Å"
+    for AS_file_parser in unsorted_AS_parsers:
+        SYMBOL_TABLE.compact_AS_parser(AS_file_parser)
 
-                            if obfuscated_name in new_name_by_old_name:
-                                new_line = new_line.replace(obfuscated_name, new_name_by_old_name[obfuscated_name])
-                            else:
-                                new_line = new_line.replace(obfuscated_name, obfuscated_name[1:-1])
+    sources.accesses_sorted = True
+    sources.AS_parsers_with_accessers = set()
+    sources.accessing_AS_parsers_by_AS_parser = None
 
-                            obfuscated_name = ""
+def get_structural_fingerprint(AS_parser:ActionScriptFileParser) -> Tuple[str, List[str]]:
+    """
+    Returns hash of everything that the parser found from the file, with every obfuscated name replaced by the index of its first occurrence,
+    and the obfuscated names in that order. So two files that only have differently numbered names get the same fingerprint,
+    and the names with the same index are the same name.
+    """
 
-                    if inside_obfuscated_name:
-                        obfuscated_name += char
+    obfuscated_names:List[str] = []
+    index_by_obfuscated_name:Dict[str, int] = {}
 
-                new_text += new_line
+    def mask_obfuscated_name(match:re.Match) -> str:
+        obfuscated_name = match.group(0)
 
-        return new_text
+        if not obfuscated_name in index_by_obfuscated_name:
+            index_by_obfuscated_name[obfuscated_name] = len(obfuscated_names)
+            obfuscated_names.append(obfuscated_name)
 
-    for root, dirs, files in os.walk(source_path):
-        for file in files:
-            file_path = os.path.join(root, file)
+        return f"#{index_by_obfuscated_name[obfuscated_name]}"
 
-            if not file.split(".")[-1] in ALLOWED_FILE_TYPES:
-                continue
+    def mask(*texts) -> str:
+        return " ".join(OBFUSCATED_NAME_PATTERN.sub(mask_obfuscated_name, str(x)) for x in texts)
 
-            new_content = loop_file_content(file_path)
+    lines = [mask("package", AS_parser.package_name, AS_parser.file_name)]
 
-            file_name = os.path.basename(file_path)
+    for import_data in AS_parser.import_datas:
+        lines.append(mask("import", import_data.import_string))
 
-            package_name = file_path.replace(source_path, "").replace(file_name, "").replace("\\", ".")
-            if len(package_name) < 2:
-                package_name = ""
-            else:
-                if package_name[0] == ".":
-                    package_name = package_name[1:]
-                if package_name[-1] == ".":
-                    package_name = package_name[:-1]
+    for class_data in AS_parser.class_datas:
+        lines.append(mask("class", class_data.visibility, class_data.name, class_data.extends, *class_data.implements))
+
+    for interface_data in AS_parser.interface_datas:
+        lines.append(mask("interface", interface_data.visibility, interface_data.name))
+
+    for var_data in AS_parser.global_var_datas:
+        lines.append(mask("var", var_data.visibility, var_data.static, var_data.name, var_data.type, var_data.value))
+
+    for function_data in AS_parser.function_datas:
+        lines.append(mask("function", function_data.visibility, function_data.static, function_data.setter_getter, function_data.name, function_data.return_type, function_data.line_count, *function_data.param_names, *function_data.param_types))
+
+    fingerprint = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+    return fingerprint, obfuscated_names
+
+def get_delta_new_name_by_old_name(previous_project:ProjectSources, previous_new_name_by_old_name:Dict[str, str], project:ProjectSources) -> Tuple[Dict[str, str], List[ActionScriptFileParser]]:
+    """
+    Returns the previous build's names converted to the obfuscated names of project, and the files of project that changed.
+    Files are unchanged if their fingerprint is found exactly once in both builds.
+    previous_project has to be parsed from the cleaned tree that previous_new_name_by_old_name was found in, because its keys are the cleaned names of that tree.
+    """
+
+    def get_AS_parsers_by_fingerprint(project:ProjectSources) -> Dict[str, List[Tuple[ActionScriptFileParser, List[str]]]]:
+        AS_parsers_by_fingerprint = {}
+
+        for AS_parser in project.actionscript_file_parsers:
+            fingerprint, obfuscated_names = get_structural_fingerprint(AS_parser)
+            AS_parsers_by_fingerprint.setdefault(fingerprint, []).append((AS_parser, obfuscated_names))
+
+        return AS_parsers_by_fingerprint
+
+    previous_AS_parsers_by_fingerprint = get_AS_parsers_by_fingerprint(previous_project)
+    AS_parsers_by_fingerprint = get_AS_parsers_by_fingerprint(project)
+
+    obfuscated_name_by_previous_obfuscated_name:Dict[str, str] = {}
+    conflicting_previous_obfuscated_names:Set[str] = set()
+    unchanged_AS_parsers:Set[ActionScriptFileParser] = set()
 
-                if package_name in new_name_by_old_name:
-                    package_name = new_name_by_old_name[package_name]
+    for fingerprint, AS_parsers in AS_parsers_by_fingerprint.items():
+        previous_AS_parsers = previous_AS_parsers_by_fingerprint.get(fingerprint, [])
 
-            if file_name in new_name_by_old_name:
-                file_name = new_name_by_old_name[file_name]
+        if len(AS_parsers) != 1 or len(previous_AS_parsers) != 1:
+            continue
 
-            new_path = new_sources + "\\" + package_name.replace(".", "\\")
+        AS_parser, obfuscated_names = AS_parsers[0]
+        previous_obfuscated_names = previous_AS_parsers[0][1]
+        unchanged_AS_parsers.add(AS_parser)
 
-            os.makedirs(new_path, exist_ok=True)
+        for previous_obfuscated_name, obfuscated_name in zip(previous_obfuscated_names, obfuscated_names):
+            if obfuscated_name_by_previous_obfuscated_name.setdefault(previous_obfuscated_name, obfuscated_name) != obfuscated_name:
+                conflicting_previous_obfuscated_names.add(previous_obfuscated_name)
 
-            with open(new_path + "\\" + file_name, 'w', encoding="utf-8") as file:
-                file.write(new_content)
+    # a name that was renamed differently in two files can't be trusted
+    for previous_obfuscated_name in conflicting_previous_obfuscated_names:
+        del obfuscated_name_by_previous_obfuscated_name[previous_obfuscated_name]
+
+    new_name_by_old_name = {}
+
+    for previous_old_name, new_name in previous_new_name_by_old_name.items():
+        previous_obfuscated_names = OBFUSCATED_NAME_PATTERN.findall(previous_old_name)
+
+        # some names like package names contain more than one obfuscated name, all of them have to be known
+        if not all(f"Å{x}Å" in obfuscated_name_by_previous_obfuscated_name for x in previous_obfuscated_names):
+            continue
+
+        old_name = OBFUSCATED_NAME_PATTERN.sub(lambda x: obfuscated_name_by_previous_obfuscated_name[x.group(0)], previous_old_name)
+        new_name_by_old_name[old_name] = new_name
+
+    changed_AS_parsers = [x for x in project.actionscript_file_parsers if not x in unchanged_AS_parsers]
+
+    return new_name_by_old_name, changed_AS_parsers
+
+def get_new_marked_name(obfuscated_name:str, new_name_by_old_name:Dict[str, str]) -> str:
+    """
+    obfuscated_name has the "Å" markers. If it doesn't have a new name, it's returned without the markers.
+    """
+
+    if obfuscated_name in new_name_by_old_name:
+        return new_name_by_old_name[obfuscated_name]
+
+    return obfuscated_name[1:-1]
+
+def get_deobfuscated_file_path(source_path:str, file_path:str, new_sources:str, new_name_by_old_name:Dict[str, str]) -> Tuple[str, str]:
+    """
+    Returns the new directory and new file name for file_path.
+    """
+
+    file_name = os.path.basename(file_path)
+
+    package_name = file_path.replace(source_path, "").replace(file_name, "").replace(os.sep, ".")
+    if len(package_name) < 2:
+        package_name = ""
+    else:
+        if package_name[0] == ".":
+            package_name = package_name[1:]
+        if package_name[-1] == ".":
+            package_name = package_name[:-1]
+
+        if package_name in new_name_by_old_name:
+            package_name = new_name_by_old_name[package_name]
+
+    if file_name in new_name_by_old_name:
+        file_name = new_name_by_old_name[file_name]
+
+    new_path = new_sources + os.sep + package_name.replace(".", os.sep)
+
+    return new_path, file_name
+
+def apply_deobfuscations_to_files(source_path:str, new_sources:str, new_name_by_old_name:Dict[str, str], worker_count:int = APPLY_WORKER_COUNT, texts_by_file_path:Dict[str, str] | None = None, progress_events:ProgressEventStream | None = None) -> None:
+    """
+    If worker_count is bigger than 1, the files are rewritten and written in a thread pool.
+    If texts_by_file_path is given, its texts are used instead of reading the files from source_path.
+    """
+
+    def deobfuscate_file(file_path:str, new_file_path:str) -> Tuple[int, float]:
+        start_time = time.perf_counter()
+
+        if texts_by_file_path == None:
+            # only the marked names are decoded, and files without them are copied as they are
+            file_size = OBFUSCATED_NAME_SCANNER.rewrite_file(file_path, new_file_path, lambda x: get_new_marked_name(x, new_name_by_old_name), new_names_by_marked_name)
+
+            return file_size, time.perf_counter() - start_time
+
+        text = texts_by_file_path[file_path]
+        OBFUSCATED_NAME_SCANNER.write_data(new_file_path, OBFUSCATED_NAME_SCANNER.rewrite_data(text.encode("utf-8"), lambda x: get_new_marked_name(x, new_name_by_old_name), new_names_by_marked_name))
+
+        return len(text), time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    new_names_by_marked_name:Dict[bytes, bytes] = {} # shared by all the files, so every name is encoded only once
+
+    if texts_by_file_path != None:
+        file_paths = list(texts_by_file_path)
+    else:
+        file_paths = get_action_script_file_paths(source_path)
+    new_paths_and_file_names = [get_deobfuscated_file_path(source_path, file_path, new_sources, new_name_by_old_name) for file_path in file_paths]
+    new_file_paths = [new_path + os.sep + file_name for new_path, file_name in new_paths_and_file_names]
+    file_paths, new_file_paths = drop_colliding_new_file_paths(file_paths, new_file_paths)
+
+    for new_path in set(new_path for new_path, _ in new_paths_and_file_names):
+        os.makedirs(new_path, exist_ok=True)
+
+    file_sizes_and_times:List[Tuple[int, float]] = []
+
+    def collect_file_sizes_and_times(results) -> None:
+        # the results are handled as they come, so the progress events are written from this thread while the workers write the files
+        for new_file_path, file_size_and_time in zip(new_file_paths, results):
+            file_sizes_and_times.append(file_size_and_time)
+
+            if progress_events:
+                progress_events.file_done("file_written", new_file_path, file_size_and_time[0], elapsed=file_size_and_time[1])
+
+    if progress_events:
+        progress_events.start_stage("write", len(file_paths), new_sources=new_sources)
+
+    if worker_count > 1:
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            collect_file_sizes_and_times(executor.map(deobfuscate_file, file_paths, new_file_paths))
+    else:
+        collect_file_sizes_and_times(map(deobfuscate_file, file_paths, new_file_paths))
+
+    if progress_events:
+        progress_events.end_stage()
+
+    print_apply_throughput(file_sizes_and_times, time.perf_counter() - start_time)
+
+def drop_colliding_new_file_paths(file_paths:List[str], new_file_paths:List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Two files get the same new path if their names were deobfuscated to the same name. The worker threads would race on writing that path,
+    so only the last of the files is kept, which is the one that the serial loop would leave there. A warning is printed for every collision.
+    The paths are compared with os.path.normcase, because on windows "A.as" and "a.as" are the same file.
+    """
+
+    index_by_new_file_path:Dict[str, int] = {}
+
+    for index, new_file_path in enumerate(new_file_paths):
+        key = os.path.normcase(new_file_path)
+
+        if key in index_by_new_file_path:
+            print(f"WARNING: {file_paths[index_by_new_file_path[key]]} and {file_paths[index]} are both deobfuscated to {new_file_path}, only {file_paths[index]} is written")
+
+        index_by_new_file_path[key] = index
+
+    kept_indexes = sorted(index_by_new_file_path.values())
+
+    return [file_paths[x] for x in kept_indexes], [new_file_paths[x] for x in kept_indexes]
+
+def print_apply_throughput(file_sizes_and_times:List[Tuple[int, float]], total_time:float) -> None:
+    if len(file_sizes_and_times) == 0:
+        return
+
+    total_size = sum(file_size for file_size, _ in file_sizes_and_times)
+    file_time_sum = sum(file_time for _, file_time in file_sizes_and_times)
+    slowest_file_time = max(file_time for _, file_time in file_sizes_and_times)
+    megabytes = total_size / (1024 * 1024)
+
+    print(f"wrote {len(file_sizes_and_times)} files ({megabytes:.2f} MB) in {total_time:.2f}s: {megabytes / max(total_time, 1e-9):.2f} MB/s, {len(file_sizes_and_times) / max(total_time, 1e-9):.1f} files/s")
+    print(f"per file: {file_time_sum / len(file_sizes_and_times) * 1000:.2f} ms average, {slowest_file_time * 1000:.2f} ms slowest, {megabytes / max(file_time_sum, 1e-9):.2f} MB/s")
 
 def test_action_script_file_parser() -> None:
     # Copy the string to the clipboard
@@ -1226,28 +3251,124 @@ def test_action_script_file_parser() -> None:
     print("copied action_script_file_datas to clipboard!")
 
 def main() -> None:
-    reference_project = parse_project_sources(REFERENCE_PROJECT_PATH)
-    target_project = parse_project_sources(TARGET_PROJECT_PATH)
+    profiler = Profiler() if ENABLE_PROFILING else None
+
+    if profiler:
+        profiler.install()
+
+    parse_cache = ParseCache(PARSE_CACHE_PATH, PARSE_CACHE_SIZE_LIMIT) if PARSE_CACHE_ENABLED else None
+    progress_events = ProgressEventStream(PROGRESS_EVENTS_PATH) if ENABLE_PROGRESS_EVENTS else None
+
+    target_source_path = TARGET_PROJECT_PATH
+    target_texts_by_file_path = None
+
+    if ENABLE_FUSED_PIPELINE:
+        # the cleaned texts are keyed by relative paths, so the source path is empty
+        target_source_path = ""
+        target_texts_by_file_path = name_cleaner.clean_files_in_memory()
+
+    reference_project = parse_project_sources(REFERENCE_PROJECT_PATH, parse_cache=parse_cache, progress_events=progress_events)
+    target_project = parse_project_sources(target_source_path, parse_cache=parse_cache, texts_by_file_path=target_texts_by_file_path, progress_events=progress_events)
+    SYMBOL_TABLE.print_summary()
 
     basic_class_and_package_name_deobfuscation_pass = BasicClassAndPackageNameDeobfuscationPass(reference_project, target_project)
     function_name_deobfuscation_pass = FunctionNameDeobfuscationPass(reference_project, target_project, line_count_deobfudcation_enabled=True)
     variable_name_deobfuscation_pass = VariableNameDeobfuscationPass(reference_project, target_project)
     import_deobfuscation_pass = ImportMatchingClassAndPackageNameDeobfuscationPass(reference_project, target_project)
 
-    basic_class_and_package_name_deobfuscation_pass.deobfuscate()
-    function_name_deobfuscation_pass.deobfuscate()
-    variable_name_deobfuscation_pass.deobfuscate()
-    import_deobfuscation_pass.deobfuscate()
-    basic_class_and_package_name_deobfuscation_pass.deobfuscate()
-    function_name_deobfuscation_pass.deobfuscate()
-    variable_name_deobfuscation_pass.deobfuscate()
-    import_deobfuscation_pass.deobfuscate()
+    deobfuscation_pass_scheduler = DeobfuscationPassScheduler(target_project, [
+        basic_class_and_package_name_deobfuscation_pass,
+        function_name_deobfuscation_pass,
+        variable_name_deobfuscation_pass,
+        import_deobfuscation_pass,
+    ], progress_events=progress_events)
+    mapping_database = MappingDatabase(MAPPING_DATABASE_PATH) if MAPPING_DATABASE_ENABLED else None
+    first_queued_AS_parsers = None
+
+    if ENABLE_DELTA_MODE and mapping_database == None:
+        print("WARNING: delta mode needs the previous build's names from the mapping database, so it is not used when MAPPING_DATABASE_ENABLED is False")
+
+    if mapping_database:
+        builds = []
+
+        if MAPPING_DATABASE_SEED_BUILD != None:
+            builds.append(MAPPING_DATABASE_SEED_BUILD)
 
-    apply_deobfuscations_to_files(TARGET_PROJECT_PATH, DEOBFUSCATED_CODE_SAVE_PATH, target_project.new_name_by_old_name)
+        if MAPPING_DATABASE_RESUME:
+            builds.append(MAPPING_DATABASE_BUILD) # loaded last, so these override the seed names
+
+        for build in builds:
+            new_name_by_old_name, origin_by_old_name = mapping_database.load(build)
+
+            if build != MAPPING_DATABASE_BUILD:
+                origin_by_old_name = {x:MappingOrigin(f"seed from {build}", 0) for x in new_name_by_old_name}
+
+            target_project.new_name_by_old_name.update(new_name_by_old_name)
+            deobfuscation_pass_scheduler.origin_by_old_name.update(origin_by_old_name)
+            print(f"loaded {len(new_name_by_old_name)} names of build {build} from the mapping database")
+
+        if len(builds) > 0:
+            first_queued_AS_parsers = deobfuscation_pass_scheduler.get_AS_parsers_with_unresolved_names()
+
+        if ENABLE_DELTA_MODE:
+            previous_new_name_by_old_name = mapping_database.load(PREVIOUS_BUILD_NAME)[0]
+            previous_project = parse_project_sources(PREVIOUS_BUILD_PROJECT_PATH, parse_cache=parse_cache, progress_events=progress_events)
+            new_name_by_old_name, changed_AS_parsers = get_delta_new_name_by_old_name(previous_project, previous_new_name_by_old_name, target_project)
+
+            for old_name, new_name in new_name_by_old_name.items():
+                if not old_name in target_project.new_name_by_old_name:
+                    target_project.new_name_by_old_name[old_name] = new_name
+                    deobfuscation_pass_scheduler.origin_by_old_name[old_name] = MappingOrigin(f"delta from {PREVIOUS_BUILD_NAME}", 0)
+
+            if first_queued_AS_parsers != None:
+                queued_AS_parsers = set(changed_AS_parsers) | set(first_queued_AS_parsers)
+                changed_AS_parsers = [x for x in target_project.actionscript_file_parsers if x in queued_AS_parsers]
+
+            first_queued_AS_parsers = changed_AS_parsers
+            print(f"delta mode: {len(target_project.actionscript_file_parsers) - len(changed_AS_parsers)} of {len(target_project.actionscript_file_parsers)} files unchanged, {len(new_name_by_old_name)} names copied from build {PREVIOUS_BUILD_NAME}")
+
+    deobfuscation_pass_scheduler.run(first_queued_AS_parsers)
+
+    if ENABLE_FUZZY_CLASS_MATCHING:
+        fuzzy_class_and_package_name_deobfuscation_pass = FuzzyClassAndPackageNameDeobfuscationPass(reference_project, target_project, progress_events=progress_events)
+        new_name_by_old_name_before_fuzzy_matching = dict(target_project.new_name_by_old_name)
+
+        fuzzy_class_and_package_name_deobfuscation_pass.deobfuscate()
+        fuzzy_class_and_package_name_deobfuscation_pass.print_summary()
+        deobfuscation_pass_scheduler.record_changed_names(new_name_by_old_name_before_fuzzy_matching, type(fuzzy_class_and_package_name_deobfuscation_pass).__name__)
+
+        # the other passes can find more names from the fuzzy matched files
+        changed_names = deobfuscation_pass_scheduler.get_changed_names(new_name_by_old_name_before_fuzzy_matching)
+        deobfuscation_pass_scheduler.run(deobfuscation_pass_scheduler.get_AS_parsers_using_names(changed_names))
+
+    deobfuscation_pass_scheduler.print_summary()
+
+    if EXPORT_PROJECT_SNAPSHOTS:
+        if numpy == None:
+            print("WARNING: numpy is not installed, so the project snapshots are not saved")
+        else:
+            ProjectSnapshot(os.path.join(PROJECT_SNAPSHOT_PATH, "reference")).export_project(reference_project)
+            ProjectSnapshot(os.path.join(PROJECT_SNAPSHOT_PATH, "target")).export_project(target_project)
+
+    if mapping_database:
+        mapping_database.store(MAPPING_DATABASE_BUILD, target_project.new_name_by_old_name, deobfuscation_pass_scheduler.origin_by_old_name)
+        mapping_database.close()
+
+    apply_deobfuscations_to_files(target_source_path, DEOBFUSCATED_CODE_SAVE_PATH, target_project.new_name_by_old_name, texts_by_file_path=target_texts_by_file_path, progress_events=progress_events)
     
     #pyperclip.copy(json.dumps(target_project.new_name_by_old_name))
     #print("copied new_name_by_old_name to clipboard!")
 
+    if parse_cache:
+        parse_cache.print_summary()
+
+    if progress_events:
+        progress_events.close()
+
+    if profiler:
+        profiler.uninstall()
+        profiler.write_report(PROFILING_REPORT_PATH)
+
     print("DONE!")
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the scripts are not a package, so the tests import them straight from src like the scripts import each other
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,225 @@
+import pytest
+
+from rtanks_deobfuscator import ActionScriptFileParser, ProjectSources
+
+# FFDec output: every "{" is on its own line
+FFDEC_STYLE_TEXT = """package alpha.tanks
+{
+   import alpha.gui.Panel;
+   import flash.display.Sprite;
+   
+   public class Tank extends Sprite
+   {
+      
+      public static var count:int = 0;
+       
+      
+      private var panel:Panel;
+      
+      protected var speed:Number = 1.5;
+      
+      public function Tank(param1:Panel, param2:int = 3)
+      {
+         super();
+         this.panel = param1;
+         var _loc3_:Panel = param1;
+         _loc3_.show();
+      }
+      
+      public function get name() : String
+      {
+         return "tank";
+      }
+      
+      private static function helper(param1:String) : void
+      {
+         var _loc2_:int = 0;
+         while(_loc2_ < 10)
+         {
+            _loc2_++;
+         }
+      }
+   }
+}
+"""
+
+# What the line based parser (before the token parser) gave for FFDEC_STYLE_TEXT:
+# (name, visibility, static, return type, param names, param types, line count, setter_getter)
+# The only difference to the token parser is the second param, which the line based parser read as " param2" and "int = 3".
+LINE_BASED_PARSER_FUNCTIONS = [
+    ("Tank", "public", False, "", ["param1", " param2"], ["Panel", "int = 3"], 5, ""),
+    ("name", "public", False, "String", [], [], 2, "get"),
+    ("helper", "private", True, "void", ["param1"], ["String"], 6, ""),
+]
+
+TURRET_FFDEC_STYLE_TEXT = """package alpha.tanks
+{
+   import alpha.gui.Panel;
+
+   public class Turret
+   {
+      private var panel:Panel;
+
+      public function Turret(param1:Panel)
+      {
+         this.panel = param1;
+      }
+
+      public function rotate(param1:Number) : void
+      {
+         var _loc2_:Number = param1;
+         this.panel.show();
+      }
+   }
+}
+"""
+
+# same class as above with "{" on the signature line, which the line based parser didn't handle (every line count was 0 and the bodies were not read)
+TURRET_SAME_LINE_BRACE_TEXT = """package alpha.tanks
+{
+   import alpha.gui.Panel;
+
+   public class Turret
+   {
+      private var panel:Panel;
+
+      public function Turret(param1:Panel) {
+         this.panel = param1;
+      }
+
+      public function rotate(param1:Number) : void {
+         var _loc2_:Number = param1;
+         this.panel.show();
+      }
+   }
+}
+"""
+
+# FFDec puts the helper classes of a file after the package block, "this" in Tank must still mean Tank
+TWO_CLASSES_TEXT = """package alpha.tanks
+{
+   public class Tank
+   {
+      private var speed:Number;
+
+      public function Tank()
+      {
+         this.speed.toFixed();
+      }
+   }
+}
+
+class TankHelper
+{
+   private var count:int;
+
+   public function TankHelper()
+   {
+      this.count.toString();
+   }
+}
+"""
+
+PANEL_TEXT = """package alpha.gui
+{
+   public class Panel
+   {
+      public function show() : void
+      {
+      }
+   }
+}
+"""
+
+
+def parse(text:str, lazy_function_bodies:bool) -> ActionScriptFileParser:
+    AS_parser = ActionScriptFileParser("Test.as", text, lazy_function_bodies)
+    AS_parser.parse_function_bodies()
+
+    return AS_parser
+
+def get_function_rows(AS_parser:ActionScriptFileParser):
+    return [(x.name, x.visibility, x.static, x.return_type, x.param_names, x.param_types, x.line_count, x.setter_getter) for x in AS_parser.function_datas]
+
+def get_rows(AS_parser:ActionScriptFileParser):
+    return (
+        AS_parser.package_name,
+        [x.import_string for x in AS_parser.import_datas],
+        AS_parser.class_datas,
+        AS_parser.global_var_datas,
+        AS_parser.function_datas,
+        AS_parser.access_datas,
+    )
+
+
+@pytest.mark.parametrize("lazy_function_bodies", [False, True])
+def test_ffdec_style_matches_line_based_parser(lazy_function_bodies):
+    AS_parser = parse(FFDEC_STYLE_TEXT, lazy_function_bodies)
+    expected_functions = [list(x) for x in LINE_BASED_PARSER_FUNCTIONS]
+    expected_functions[0][4] = ["param1", "param2"]
+    expected_functions[0][5] = ["Panel", "int"]
+
+    assert AS_parser.package_name == "alpha.tanks"
+    assert [x.import_string for x in AS_parser.import_datas] == ["alpha.gui.Panel", "flash.display.Sprite"]
+    assert [(x.name, x.extends, x.visibility) for x in AS_parser.class_datas] == [("Tank", "Sprite", "public")]
+    assert [(x.name, x.visibility, x.type, x.static, x.value) for x in AS_parser.global_var_datas] == [
+        ("count", "public", "int", True, "0"),
+        ("panel", "private", "Panel", False, ""),
+        ("speed", "protected", "Number", False, "1.5"),
+    ]
+    assert get_function_rows(AS_parser) == [tuple(x) for x in expected_functions]
+
+@pytest.mark.parametrize("lazy_function_bodies", [False, True])
+def test_brace_style_doesnt_change_results(lazy_function_bodies):
+    ffdec_AS_parser = parse(TURRET_FFDEC_STYLE_TEXT, lazy_function_bodies)
+    same_line_brace_AS_parser = parse(TURRET_SAME_LINE_BRACE_TEXT, lazy_function_bodies)
+
+    assert get_function_rows(ffdec_AS_parser) == [
+        ("Turret", "public", False, "", ["param1"], ["Panel"], 2, ""),
+        ("rotate", "public", False, "void", ["param1"], ["Number"], 3, ""),
+    ]
+    assert get_rows(same_line_brace_AS_parser) == get_rows(ffdec_AS_parser)
+    assert [(x.function_name, x.sub_accesses) for x in same_line_brace_AS_parser.access_datas] == [("Turret", ["panel"]), ("rotate", ["panel", "show"])]
+
+@pytest.mark.parametrize("text", [FFDEC_STYLE_TEXT, TURRET_FFDEC_STYLE_TEXT, TURRET_SAME_LINE_BRACE_TEXT])
+def test_lazy_and_eager_token_paths_are_same(text):
+    assert get_rows(parse(text, True)) == get_rows(parse(text, False))
+
+@pytest.mark.parametrize("lazy_function_bodies", [False, True])
+def test_this_means_enclosing_class(lazy_function_bodies):
+    AS_parser = parse(TWO_CLASSES_TEXT, lazy_function_bodies)
+
+    assert [(x.function_name, x.accessed_class_name_and_package, x.sub_accesses) for x in AS_parser.access_datas] == [
+        ("Tank", "alpha.tanks.Tank", ["speed", "toFixed"]),
+        ("TankHelper", "alpha.tanks.TankHelper", ["count", "toString"]),
+    ]
+
+def make_project(lazy_function_bodies:bool) -> ProjectSources:
+    project = ProjectSources()
+
+    for file_name, text in [("Tank.as", FFDEC_STYLE_TEXT), ("Turret.as", TURRET_FFDEC_STYLE_TEXT), ("Panel.as", PANEL_TEXT)]:
+        project.add_actionscript_file_parser(ActionScriptFileParser(file_name, text, lazy_function_bodies))
+
+    return project
+
+def get_accesser_rows(project:ProjectSources):
+    rows = []
+
+    for AS_parser in project.actionscript_file_parsers:
+        for data in AS_parser.global_var_datas + AS_parser.function_datas:
+            rows.append((AS_parser.file_name, data.name, [(x.package_name, x.file_name, x.name) for x in data.accessers]))
+
+    return rows
+
+def test_accessers_prepared_per_file_are_same_as_prepared_for_project():
+    eager_project = make_project(False)
+    eager_project.prepare_accessers()
+    lazy_project = make_project(True)
+
+    # Panel first, so its accessers come from the bodies of Tank and Turret before they are prepared themselves
+    for AS_parser in reversed(lazy_project.actionscript_file_parsers):
+        lazy_project.prepare_accessers_of(AS_parser)
+
+    assert lazy_project.accesses_sorted == False
+    assert get_accesser_rows(lazy_project) == get_accesser_rows(eager_project)
+    assert ("Panel.as", "show", [("alpha.tanks", "Tank.as", "Tank"), ("alpha.tanks", "Turret.as", "rotate")]) in get_accesser_rows(eager_project)
@@ -0,0 +1,106 @@
+from rtanks_deobfuscator import ActionScriptFileParser, DeobfuscationPassScheduler, ProjectSources
+
+# Tank imports Panel from the same package, Label doesn't import anything
+TANK_TEXT = """package Åobfuscated_name_1Å
+{
+   import Åobfuscated_name_1Å.Åobfuscated_name_2Å;
+
+   public class Åobfuscated_name_3Å
+   {
+
+      private var Åobfuscated_name_4Å:Åobfuscated_name_2Å;
+
+      public function Åobfuscated_name_3Å()
+      {
+         super();
+      }
+   }
+}
+"""
+
+PANEL_TEXT = """package Åobfuscated_name_1Å
+{
+   public class Åobfuscated_name_2Å
+   {
+
+      public function Åobfuscated_name_5Å() : void
+      {
+      }
+   }
+}
+"""
+
+LABEL_TEXT = """package Åobfuscated_name_1Å
+{
+   public class Åobfuscated_name_6Å
+   {
+
+      public var Åobfuscated_name_7Å:String;
+   }
+}
+"""
+
+# names that a previous run of the same build has found
+TANK_NEW_NAME_BY_OLD_NAME = {
+    "Åobfuscated_name_1Å":"alpha.tanks",
+    "Åobfuscated_name_3Å":"Tank",
+    "Åobfuscated_name_3Å.as":"Tank.as",
+    "Åobfuscated_name_4Å":"panel",
+}
+LABEL_NEW_NAME_BY_OLD_NAME = {
+    "Åobfuscated_name_6Å":"Label",
+    "Åobfuscated_name_6Å.as":"Label.as",
+    "Åobfuscated_name_7Å":"text",
+}
+PANEL_NEW_NAME_BY_OLD_NAME = {
+    "Åobfuscated_name_2Å":"Panel",
+    "Åobfuscated_name_2Å.as":"Panel.as",
+    "Åobfuscated_name_5Å":"show",
+}
+
+
+class RecordingPass:
+    def __init__(self) -> None:
+        self.handled_file_names = []
+
+    def deobfuscate(self, target_AS_parsers) -> None:
+        self.handled_file_names.append([x.file_name for x in target_AS_parsers])
+
+
+def make_project(new_name_by_old_name) -> ProjectSources:
+    project = ProjectSources()
+
+    for class_name, text in [("Åobfuscated_name_3Å", TANK_TEXT), ("Åobfuscated_name_2Å", PANEL_TEXT), ("Åobfuscated_name_6Å", LABEL_TEXT)]:
+        project.add_actionscript_file_parser(ActionScriptFileParser(class_name + ".as", text))
+
+    project.new_name_by_old_name.update(new_name_by_old_name)
+
+    return project
+
+def get_unresolved_file_names(new_name_by_old_name):
+    scheduler = DeobfuscationPassScheduler(make_project(new_name_by_old_name), [])
+
+    return [x.file_name for x in scheduler.get_AS_parsers_with_unresolved_names()]
+
+
+def test_fresh_project_queues_every_file():
+    assert get_unresolved_file_names({}) == ["Åobfuscated_name_3Å.as", "Åobfuscated_name_2Å.as", "Åobfuscated_name_6Å.as"]
+
+def test_loaded_names_queue_only_unresolved_files():
+    assert get_unresolved_file_names({**TANK_NEW_NAME_BY_OLD_NAME, **LABEL_NEW_NAME_BY_OLD_NAME, **PANEL_NEW_NAME_BY_OLD_NAME}) == []
+
+    # Panel is unresolved, so Tank is queued again too, because the import matching pass gives Panel its names through Tank
+    assert get_unresolved_file_names({**TANK_NEW_NAME_BY_OLD_NAME, **LABEL_NEW_NAME_BY_OLD_NAME}) == ["Åobfuscated_name_3Å.as", "Åobfuscated_name_2Å.as"]
+
+    # one unresolved member is enough
+    label_new_name_by_old_name = dict(LABEL_NEW_NAME_BY_OLD_NAME)
+    del label_new_name_by_old_name["Åobfuscated_name_7Å"]
+    assert get_unresolved_file_names({**TANK_NEW_NAME_BY_OLD_NAME, **label_new_name_by_old_name, **PANEL_NEW_NAME_BY_OLD_NAME}) == ["Åobfuscated_name_6Å.as"]
+
+def test_resumed_run_passes_only_unresolved_files():
+    recording_pass = RecordingPass()
+    scheduler = DeobfuscationPassScheduler(make_project({**TANK_NEW_NAME_BY_OLD_NAME, **LABEL_NEW_NAME_BY_OLD_NAME}), [recording_pass])
+    scheduler.run(scheduler.get_AS_parsers_with_unresolved_names())
+
+    # the pass didn't add any names, so there is only one round
+    assert recording_pass.handled_file_names == [["Åobfuscated_name_3Å.as", "Åobfuscated_name_2Å.as"]]
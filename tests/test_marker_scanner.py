@@ -0,0 +1,53 @@
+import os
+import re
+
+import pytest
+
+import marker_scanner
+from marker_scanner import MarkerScanner
+
+TEXT = "package Åobfuscated_name_1Å\n{\n   public class Åobfuscated_name_2Å\n   {\n      // no names on this line\n      public var Åobfuscated_name_3Å:int;\n   }\n}\n"
+NEW_NAME_BY_OLD_NAME = {"Åobfuscated_name_1Å":"alpha.tanks", "Åobfuscated_name_2Å":"Tank", "Åobfuscated_name_3Å":"speed"}
+
+
+def write_bytes(file_path, data:bytes) -> str:
+    with open(file_path, "wb") as file:
+        file.write(data)
+
+    return str(file_path)
+
+def read_bytes(file_path) -> bytes:
+    with open(file_path, "rb") as file:
+        return file.read()
+
+def rewrite_in_text_mode(file_path:str, new_file_path:str, linesep:str) -> None:
+    """
+    How the files were rewritten before the scanner, with linesep as the platform's line ending.
+    """
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        text = re.sub("Å[^Å\n]*Å", lambda x: NEW_NAME_BY_OLD_NAME[x.group(0)], file.read())
+
+    with open(new_file_path, "w", encoding="utf-8", newline=linesep) as file:
+        file.write(text)
+
+
+@pytest.mark.parametrize("mmap_min_file_size", [marker_scanner.MMAP_MIN_FILE_SIZE, 1])
+@pytest.mark.parametrize("linesep", ["\n", "\r\n"])
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+@pytest.mark.parametrize("text", [TEXT, TEXT.replace("Å", "")])
+def test_rewrite_file_writes_same_line_endings_as_text_mode(tmp_path, monkeypatch, mmap_min_file_size, linesep, newline, text):
+    monkeypatch.setattr(marker_scanner, "MMAP_MIN_FILE_SIZE", mmap_min_file_size)
+    monkeypatch.setattr(os, "linesep", linesep)
+    file_path = write_bytes(tmp_path / "Test.as", text.replace("\n", newline).encode("utf-8"))
+
+    rewrite_in_text_mode(file_path, tmp_path / "expected.as", linesep)
+    MarkerScanner("Å").rewrite_file(file_path, str(tmp_path / "new.as"), lambda x: NEW_NAME_BY_OLD_NAME[x])
+
+    assert read_bytes(tmp_path / "new.as") == read_bytes(tmp_path / "expected.as")
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_unclosed_marker_takes_line_break_as_text_mode_reads_it(tmp_path, newline):
+    file_path = write_bytes(tmp_path / "Test.as", "a §b§ c §d\ne\n".replace("\n", newline).encode("utf-8"))
+
+    assert MarkerScanner("§", include_unclosed=True).get_marked_names(file_path) == {"§b§", "§d\n"}
@@ -0,0 +1,29 @@
+import pytest
+
+import name_cleaner
+
+
+@pytest.fixture(autouse=True)
+def clear_hash_ids(monkeypatch):
+    monkeypatch.setattr(name_cleaner, "old_name_by_hash_id", {})
+
+def get_hash_ids(names):
+    name_cleaner.old_name_by_hash_id.clear()
+
+    return {x:name_cleaner.get_hash_id(x) for x in names}
+
+
+def test_hash_id_depends_only_on_name():
+    names = ["§a§", "§b§", "§5L§"]
+    hash_ids = get_hash_ids(names)
+
+    # a new name found first must not change the ids of the old names
+    assert get_hash_ids(["§new§"] + list(reversed(names))) == {**hash_ids, "§new§":get_hash_ids(["§new§"])["§new§"]}
+    assert {len(x) for x in hash_ids.values()} == {name_cleaner.NAME_HASH_LENGTH}
+
+def test_same_hash_id_stops_cleaning(monkeypatch):
+    monkeypatch.setattr(name_cleaner, "NAME_HASH_LENGTH", 1)
+    names = ["§" + str(x) + "§" for x in range(17)] # 16 possible ids, so two of these must collide
+
+    with pytest.raises(ValueError):
+        get_hash_ids(names)
@@ -0,0 +1,39 @@
+import tracemalloc
+
+import rtanks_deobfuscator
+from rtanks_deobfuscator import Utils
+
+
+class FakeResource:
+    RUSAGE_SELF = 0
+
+    def __init__(self, max_rss:int) -> None:
+        self.max_rss = max_rss
+
+    def getrusage(self, who):
+        return type("Usage", (), {"ru_maxrss":self.max_rss})
+
+
+def test_max_rss_unit_depends_on_platform(monkeypatch):
+    monkeypatch.setattr(rtanks_deobfuscator, "psutil", None)
+    monkeypatch.setattr(rtanks_deobfuscator, "resource", FakeResource(512 * 1024 * 1024))
+
+    monkeypatch.setattr(rtanks_deobfuscator.sys, "platform", "darwin")
+    assert Utils.get_peak_memory_usage() == 512
+
+    monkeypatch.setattr(rtanks_deobfuscator.sys, "platform", "linux")
+    assert Utils.get_peak_memory_usage() == 512 * 1024
+
+def test_tracemalloc_is_used_without_psutil_and_resource(monkeypatch):
+    monkeypatch.setattr(rtanks_deobfuscator, "psutil", None)
+    monkeypatch.setattr(rtanks_deobfuscator, "resource", None)
+
+    assert Utils.get_peak_memory_usage() == None
+
+    tracemalloc.start()
+
+    try:
+        data = bytearray(4 * 1024 * 1024)
+        assert Utils.get_peak_memory_usage() >= 4
+    finally:
+        tracemalloc.stop()
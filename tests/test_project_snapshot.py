@@ -0,0 +1,119 @@
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from rtanks_deobfuscator import ActionScriptFileParser, ProjectSnapshot, ProjectSources
+
+TANK_TEXT = """package alpha.tanks
+{
+   import alpha.gui.Panel;
+   import flash.display.Sprite;
+
+   public class Tank extends Sprite implements IMovable
+   {
+
+      public static var count:int = 0;
+
+      private var panel:Panel;
+
+      public function Tank(param1:Panel, param2:int = 3)
+      {
+         super();
+         this.panel = param1;
+         this.panel.show();
+      }
+
+      public function get name() : String
+      {
+         return "tänk";
+      }
+   }
+}
+"""
+
+PANEL_TEXT = """package alpha.gui
+{
+   public class Panel
+   {
+
+      public function show() : void
+      {
+      }
+   }
+}
+"""
+
+MOVABLE_TEXT = """package alpha.tanks
+{
+   public interface IMovable
+   {
+   }
+}
+"""
+
+
+def make_project() -> ProjectSources:
+    project = ProjectSources()
+
+    for file_name, text in [("Tank.as", TANK_TEXT), ("Panel.as", PANEL_TEXT), ("IMovable.as", MOVABLE_TEXT)]:
+        project.add_actionscript_file_parser(ActionScriptFileParser(file_name, text))
+
+    project.new_name_by_old_name.update({"§a§":"alpha", "§b§":"Tänk"})
+
+    return project
+
+def get_rows(project:ProjectSources):
+    rows = []
+
+    for AS_parser in project.actionscript_file_parsers:
+        rows.append((
+            AS_parser.package_name,
+            AS_parser.file_name,
+            AS_parser.import_datas,
+            AS_parser.import_string_by_class_name,
+            AS_parser.class_datas,
+            AS_parser.interface_datas,
+            AS_parser.global_var_datas,
+            AS_parser.global_var_datas_by_name,
+            AS_parser.function_datas,
+            AS_parser.function_datas_by_name,
+        ))
+
+    return rows, project.new_name_by_old_name
+
+
+def test_imported_project_is_same_as_exported(tmp_path):
+    project = make_project()
+    ProjectSnapshot(str(tmp_path)).export_project(project)
+
+    imported_project = ProjectSnapshot(str(tmp_path)).import_project()
+
+    assert imported_project.accesses_sorted == True
+    assert get_rows(imported_project) == get_rows(project)
+    assert imported_project.actionscript_file_parsers_by_class_name_and_package.keys() == project.actionscript_file_parsers_by_class_name_and_package.keys()
+
+    # the accessers are sorted in the export, so they must come through the tables
+    panel_show = imported_project.actionscript_file_parsers[1].function_datas_by_name["show"]
+    assert [(x.package_name, x.file_name, x.name) for x in panel_show.accessers] == [("alpha.tanks", "Tank.as", "Tank")]
+
+def test_tables_can_be_read_with_numpy(tmp_path):
+    ProjectSnapshot(str(tmp_path)).export_project(make_project())
+
+    strings = numpy.load(tmp_path / "strings.npy", mmap_mode="r").tobytes()
+    string_offsets = numpy.load(tmp_path / "string_offsets.npy", mmap_mode="r")
+    files = numpy.load(tmp_path / "files.npy", mmap_mode="r")
+
+    def get_string(index:int) -> str:
+        return strings[string_offsets[index]:string_offsets[index + 1]].decode("utf-8")
+
+    assert [get_string(x) for x in files["file_name"]] == ["Tank.as", "Panel.as", "IMovable.as"]
+    assert files["function_count"].tolist() == [2, 1, 0]
+
+def test_other_format_version_is_not_imported(tmp_path):
+    ProjectSnapshot(str(tmp_path)).export_project(make_project())
+    numpy.save(tmp_path / "version.npy", numpy.array([ProjectSnapshot.FORMAT_VERSION + 1], dtype="u4"))
+
+    assert ProjectSnapshot(str(tmp_path)).import_project() == None
+
+def test_missing_snapshot_is_not_imported(tmp_path):
+    assert ProjectSnapshot(str(tmp_path / "nothing")).import_project() == None